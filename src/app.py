@@ -6,11 +6,12 @@ from core.llm_manager import LLMManager
 from core.financial_news_generator import FinancialNewsGenerator
 from core.scientific_rag import ScientificContentRAG
 from core.image_generator import ImageGenerator
-from config.settings import AVAILABLE_PLATFORMS, APP_SETTINGS, LLM_PROVIDERS
+from config.settings import AVAILABLE_PLATFORMS, APP_SETTINGS, LLM_PROVIDERS, STABLE_DIFFUSION_PROFILES, STABLE_DIFFUSION_SETTINGS
 import plotly.graph_objs as plt
 import yfinance as yf
 from core.scientific_rag import ScientificContentRAG
 import io
+import json
 import zipfile
 from langsmith import Client, traceable
 import os
@@ -54,7 +55,7 @@ def main():
     ], key="app_selector")
     
     # Selector de proveedor LLM
-    llm_provider = st.sidebar.selectbox("Proveedor LLM", list(LLM_PROVIDERS.keys()))
+    llm_provider = st.sidebar.selectbox("Proveedor LLM", list(LLM_PROVIDERS.keys()) + ["auto"])
     
     # Flujo principal basado en la aplicación seleccionada
     if aplicacion == "Generar Contenido por Plataforma":
@@ -74,6 +75,13 @@ def main():
 
 def generar_contenido_por_plataforma(idioma, llm_provider):
     st.header("Generar contenido para plataformas")
+    
+    # Modo campaña: todas las combinaciones de plataforma e idioma de una vez
+    modo_campana = st.checkbox("Modo campaña (varias plataformas e idiomas)")
+    if modo_campana:
+        generar_campana(idioma, llm_provider)
+        return
+    
     # Selección de plataforma
     platform = st.selectbox("Selecciona la plataforma", AVAILABLE_PLATFORMS)
     
@@ -87,10 +95,12 @@ def generar_contenido_por_plataforma(idioma, llm_provider):
     # Opciones de imagen (solo si el checkbox está marcado)
     image_generator = None
     image_prompt = None
+    sd_profile = None
     if generar_imagen:
         # Opciones de generación de imagen
         image_source = st.radio("Selecciona fuente de imagen", [
             "Generar con IA", 
+            "Buscar en Unsplash y Pixabay (la más rápida)",
             "Buscar en Unsplash",
             "Buscar en Pixabay"  # Nueva opción
         ])
@@ -101,6 +111,17 @@ def generar_contenido_por_plataforma(idioma, llm_provider):
                 'stable-diffusion', 
                 'dall-e'
             ])
+            
+            # Perfil de inferencia para Stable Diffusion
+            if generator == 'stable-diffusion':
+                profiles = list(STABLE_DIFFUSION_PROFILES.keys())
+                sd_profile = st.selectbox(
+                    "Perfil de inferencia", 
+                    profiles,
+                    index=profiles.index(STABLE_DIFFUSION_SETTINGS["profile"])
+                )
+        elif image_source == "Buscar en Unsplash y Pixabay (la más rápida)":
+            generator = 'stock'
         elif image_source == "Buscar en Unsplash":
             generator = 'unsplash'
         else:  # Pixabay
@@ -123,19 +144,19 @@ def generar_contenido_por_plataforma(idioma, llm_provider):
             idioma=idioma
         )
         
-        content = llm_manager.generate_content(
-            prompt, platform, tema, audiencia
-        )
-        
+        # Mostrar el texto según se genera
         st.write(f"### Contenido en {idioma.capitalize()}")
-        st.write(content.text)
+        stream = llm_manager.stream_content(
+            prompt, platform, tema, audiencia, language=idioma
+        )
+        st.write_stream(stream)
         
         # Generación de imagen si está marcado el checkbox
         if generar_imagen:
             st.subheader("Imagen")
             
             # Inicializar generador de imágenes
-            image_generator = ImageGenerator()
+            image_generator = ImageGenerator(sd_profile=sd_profile)
             
             # Generar o buscar imagen
             image = image_generator.generate_image(
@@ -149,6 +170,80 @@ def generar_contenido_por_plataforma(idioma, llm_provider):
             else:
                 st.error("No se pudo generar/encontrar la imagen")
 
+def generar_campana(idioma, llm_provider):
+    """
+    Genera en paralelo cada combinación (plataforma, idioma) seleccionada,
+    muestra cada resultado según termina y ofrece todo en un único ZIP
+    """
+    plataformas = st.multiselect("Plataformas", AVAILABLE_PLATFORMS, default=AVAILABLE_PLATFORMS)
+    idiomas = st.multiselect(
+        "Idiomas", 
+        ["castellano", "english", "français", "italiano"], 
+        default=[idioma]
+    )
+    
+    tema = st.text_input("¿Sobre qué tema quieres generar contenido?")
+    audiencia = st.text_input("¿Cuál es tu audiencia objetivo?")
+    
+    if st.button("Generar Campaña"):
+        if not plataformas or not idiomas:
+            st.warning("Selecciona al menos una plataforma y un idioma")
+            return
+        
+        prompt_manager = PromptManager()
+        llm_manager = LLMManager(provider=llm_provider)
+        
+        combinaciones = [(platform, lang) for lang in idiomas for platform in plataformas]
+        jobs = [
+            (prompt_manager.get_prompt(platform, tema, audiencia, idioma=lang), platform, tema, audiencia, lang)
+            for platform, lang in combinaciones
+        ]
+        
+        # Un hueco por combinación, rellenado en cuanto termina su generación
+        progreso = st.progress(0.0, text="Generando campaña...")
+        huecos = {}
+        for lang in idiomas:
+            st.write(f"### Contenido en {lang.capitalize()}")
+            for platform in plataformas:
+                st.write(f"**{platform.capitalize()}**")
+                huecos[(platform, lang)] = st.empty()
+                huecos[(platform, lang)].info("Generando...")
+        
+        resultados = {}
+        # Como mucho 16 combinaciones: todas en vuelo para que el tiempo total
+        # se acerque al de una sola generación
+        for completados, (index, result) in enumerate(
+            llm_manager.iter_generate_many(jobs, max_concurrency=len(jobs)), start=1
+        ):
+            combinacion = combinaciones[index]
+            if isinstance(result, Exception):
+                huecos[combinacion].error(f"Error generando {combinacion[0]} ({combinacion[1]}): {result}")
+            else:
+                resultados[combinacion] = result
+                huecos[combinacion].markdown(result.text)
+            progreso.progress(completados / len(jobs), text=f"{completados}/{len(jobs)} generados")
+        
+        if not resultados:
+            return
+        
+        # Paquete con el texto (Markdown) y los metadatos (JSON) de cada pieza
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for (platform, lang), content in resultados.items():
+                zip_file.writestr(f"{lang}/{platform}.md", content.text)
+                zip_file.writestr(
+                    f"{lang}/{platform}.json", 
+                    json.dumps(content.to_dict(), ensure_ascii=False, indent=2)
+                )
+        zip_buffer.seek(0)
+        
+        st.download_button(
+            label="📦 Descargar Campaña",
+            data=zip_buffer,
+            file_name="campaign.zip",
+            mime="application/zip"
+        )
+
 def informacion_financiera(idioma, llm_provider):  # Recibe el idioma como parámetro
     st.header("Noticias Financieras por Mercado")
 
@@ -267,12 +362,18 @@ def contenido_cientifico(idioma, llm_provider):
         )
         
         try:
-            # Generar informe científico con papers y posible grafo
-            result = rag_system.generate_scientific_graph_report(consulta)
+            # Generar informe científico con papers y posible grafo;
+            # el artículo se muestra según se genera
+            stream = rag_system.stream_scientific_graph_report(consulta)
             
             # Mostrar contenido científico
             st.subheader("Contenido Científico Generado")
-            st.write(result['scientific_content'])
+            st.write_stream(stream)
+            result = stream.result
+            
+            if result.get('error'):
+                st.warning("No se encontraron papers científicos para la consulta.")
+                return
             
             # Mostrar papers recuperados
             st.subheader("Papers Científicos Recuperados")
@@ -392,16 +493,16 @@ def generar_articulo_medium(idioma, llm_provider):
         # Añadir códigos al final del prompt
         prompt_con_codigo = f"{prompt}\n\n## Detailed Code Components\n\n{codigo_completo}"
         
-        # Generar contenido
-        content = llm_manager.generate_content(
+        # Generar contenido mostrándolo según llega
+        st.write("### Generated Medium Article")
+        stream = llm_manager.stream_content(
             prompt_con_codigo, 
             "medium", 
             article_title,  # Usar el título proporcionado 
             "Tech developers"
         )
-        
-        st.write("### Generated Medium Article")
-        st.write(content.text)
+        st.write_stream(stream)
+        content = stream.result
         
         # Opción de guardar artículo
         st.download_button(
@@ -0,0 +1,212 @@
+"""
+Generación por lotes sin interfaz a partir de un fichero JSONL de trabajos.
+
+Cada línea de entrada es un trabajo:
+    {"id": "opcional", "platform": "linkedin", "topic": "...", "audience": "...",
+     "language": "castellano", "image_generator": "stock", "image_prompt": "opcional"}
+
+Cada resultado se añade al JSONL de salida en cuanto termina (Content.to_dict
+más job_id). El propio fichero de salida sirve de checkpoint: al relanzar con
+la misma salida se omiten los trabajos ya completados y se reintentan los fallidos.
+Los trabajos sin "id" se identifican por su número de línea y su contenido, así
+que para reanudar no debe reordenarse el fichero de entrada.
+
+Uso:
+    python src/batch_runner.py jobs.jsonl salida.jsonl --provider openai --workers 8
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.prompt_manager import PromptManager
+from core.llm_manager import LLMManager
+from core.image_generator import ImageGenerator
+
+logger = logging.getLogger("batch_runner")
+
+
+def job_id_for(job, line_number):
+    """
+    ID explícito del trabajo o, si no lo tiene, hash estable de su línea y su
+    contenido (dos líneas idénticas son trabajos distintos)
+    """
+    if job.get("id"):
+        return str(job["id"])
+    payload = json.dumps([line_number, job], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def completed_job_ids(output_path):
+    """
+    IDs ya completados con éxito en una ejecución anterior
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Línea a medio escribir tras una caída
+            if "error" not in record:
+                done.add(record["job_id"])
+    return done
+
+
+def read_jobs(input_path, skip_ids):
+    """
+    Lee los trabajos de forma perezosa, sin cargar el fichero entero
+    """
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Línea {line_number} no válida: {e}")
+                continue
+            job_id = job_id_for(job, line_number)
+            if job_id not in skip_ids:
+                yield job_id, job
+
+
+class BatchRunner:
+    def __init__(self, output_path, provider="openai", workers=8, images_dir=None):
+        self.output_path = output_path
+        self.workers = workers
+        self.images_dir = images_dir or os.path.join(os.path.dirname(os.path.abspath(output_path)), "images")
+
+        self.prompt_manager = PromptManager()
+        self.llm_manager = LLMManager(provider=provider)
+        self._image_generator = None
+        self._image_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        self.completed = 0
+        self.failed = 0
+        self._start = None
+
+    @property
+    def image_generator(self):
+        # Solo se inicializa si algún trabajo pide imagen
+        with self._image_lock:
+            if self._image_generator is None:
+                self._image_generator = ImageGenerator()
+        return self._image_generator
+
+    def _save_image(self, job_id, image):
+        if isinstance(image, str):
+            return {"image_url": image}
+        os.makedirs(self.images_dir, exist_ok=True)
+        path = os.path.join(self.images_dir, f"{job_id}.png")
+        if isinstance(image, bytes):
+            with open(path, "wb") as f:
+                f.write(image)
+        else:
+            image.save(path)
+        return {"image_path": path}
+
+    def run_job(self, job_id, job):
+        language = job.get("language", "castellano")
+        prompt = self.prompt_manager.get_prompt(job["platform"], job["topic"], job["audience"], idioma=language)
+        content = self.llm_manager.generate_content(
+            prompt, job["platform"], job["topic"], job["audience"], language=language
+        )
+
+        record = {"job_id": job_id, **content.to_dict()}
+        if job.get("image_generator"):
+            image = self.image_generator.generate_image(
+                job.get("image_prompt") or job["topic"], job["platform"], job["image_generator"]
+            )
+            if not image:
+                # Sin la imagen pedida el trabajo no está completo: se reintenta al reanudar
+                record["error"] = "No se pudo generar la imagen"
+            else:
+                record.update(self._save_image(job_id, image))
+        return record
+
+    def _write(self, record):
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _process(self, job_id, job):
+        try:
+            record = self.run_job(job_id, job)
+        except Exception as e:
+            # El fallo queda registrado y se reintenta en la siguiente ejecución
+            record = {"job_id": job_id, "error": str(e).splitlines()[0] if str(e) else repr(e)}
+        self._write(record)
+
+        with self._write_lock:
+            if "error" in record:
+                self.failed += 1
+                logger.error(f"Trabajo {job_id} fallido: {record['error']}")
+            else:
+                self.completed += 1
+
+    def throughput(self):
+        elapsed = time.monotonic() - self._start
+        return (self.completed + self.failed) / elapsed * 60 if elapsed else 0.0
+
+    def _report_progress(self, stop, interval):
+        while not stop.wait(interval):
+            logger.info(
+                f"{self.completed} completados, {self.failed} fallidos, {self.throughput():.1f} trabajos/min"
+            )
+
+    def run(self, input_path, report_interval=30):
+        skip_ids = completed_job_ids(self.output_path)
+        if skip_ids:
+            logger.info(f"Reanudando: {len(skip_ids)} trabajos ya completados")
+
+        self._start = time.monotonic()
+        stop = threading.Event()
+        reporter = threading.Thread(target=self._report_progress, args=(stop, report_interval), daemon=True)
+        reporter.start()
+
+        # Como mucho 2 trabajos por worker en cola: la entrada se lee en streaming
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def release(_):
+            slots.release()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for job_id, job in read_jobs(input_path, skip_ids):
+                    slots.acquire()
+                    executor.submit(self._process, job_id, job).add_done_callback(release)
+        finally:
+            stop.set()
+
+        logger.info(
+            f"Terminado: {self.completed} completados, {self.failed} fallidos, "
+            f"{self.throughput():.1f} trabajos/min"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generación de contenido por lotes desde JSONL")
+    parser.add_argument("input", help="Fichero JSONL de trabajos")
+    parser.add_argument("output", help="Fichero JSONL de resultados (también checkpoint)")
+    parser.add_argument("--provider", default="openai", help="openai, groq o auto")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--images-dir", default=None)
+    parser.add_argument("--report-interval", type=float, default=30, help="Segundos entre informes de progreso")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    runner = BatchRunner(args.output, provider=args.provider, workers=args.workers, images_dir=args.images_dir)
+    runner.run(args.input, report_interval=args.report_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark del índice local de embeddings.
+
+Mide el tiempo de construcción (añadido incremental por lotes y, si
+procede, k-means IVF) y la latencia de consulta por fuerza bruta e IVF
+para corpus sintéticos de 10k, 100k y 1M abstracts.
+
+Uso:
+    python src/benchmarks/benchmark_embedding_index.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import EMBEDDING_INDEX_SETTINGS  # noqa: E402
+from core.embedding_index import EmbeddingIndex  # noqa: E402
+
+
+def _query_latency_ms(index, queries, k):
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, k=k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run_benchmark(sizes, dim, batch_size, num_queries, k):
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((num_queries, dim)).astype(np.float32)
+    results = []
+
+    for size in sizes:
+        index_dir = tempfile.mkdtemp(prefix="rutina-index-")
+        try:
+            # Sin umbral IVF para medir primero la fuerza bruta
+            index = EmbeddingIndex(index_dir, dim, ivf_threshold=float("inf"),
+                                   nlist=EMBEDDING_INDEX_SETTINGS["nlist"],
+                                   nprobe=EMBEDDING_INDEX_SETTINGS["nprobe"])
+
+            start = time.perf_counter()
+            for offset in range(0, size, batch_size):
+                rows = min(batch_size, size - offset)
+                vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+                index.add([f"paper-{offset + i}" for i in range(rows)], vectors)
+            add_seconds = time.perf_counter() - start
+
+            brute_ms = _query_latency_ms(index, queries, k)
+
+            start = time.perf_counter()
+            index.build_ivf()
+            ivf_seconds = time.perf_counter() - start
+            ivf_ms = _query_latency_ms(index, queries, k)
+
+            results.append({
+                "size": size,
+                "add_seconds": add_seconds,
+                "ivf_build_seconds": ivf_seconds,
+                "brute_force_ms": brute_ms,
+                "ivf_ms": ivf_ms
+            })
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice local de embeddings")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=EMBEDDING_INDEX_SETTINGS["dim"])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.dim, args.batch_size, args.queries, args.k)
+
+    print(f"\n{'abstracts':>10} {'añadir (s)':>11} {'IVF (s)':>8} {'fuerza bruta (ms)':>18} {'IVF (ms)':>9}")
+    for row in results:
+        print(
+            f"{row['size']:>10} {row['add_seconds']:>11.2f} {row['ivf_build_seconds']:>8.2f} "
+            f"{row['brute_force_ms']:>18.2f} {row['ivf_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark de Stable Diffusion en CPU.
+
+Mide segundos por imagen y pico de memoria residente (RSS) para cada
+tamaño de PLATFORM_SIZES con los perfiles de inferencia indicados.
+Se invoca el pipeline sin caché de imágenes y con una iteración de
+calentamiento por tamaño que no se incluye en los tiempos.
+
+Uso:
+    python src/benchmarks/benchmark_stable_diffusion.py --profiles default fast-cpu
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import STABLE_DIFFUSION_PROFILES  # noqa: E402
+from core.image_generator import ImageGenerator, sd_model_key  # noqa: E402
+from core.model_registry import model_registry  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+
+
+class PeakRSSSampler:
+    """
+    Muestrea la RSS del proceso en segundo plano para obtener el pico de cada medición
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if psutil is not None:
+            self._process = psutil.Process()
+            self.peak_bytes = self._process.memory_info().rss
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        elif resource is not None:
+            # Sin psutil solo se conoce el pico acumulado del proceso (KB en Linux)
+            self.peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+            time.sleep(self.interval)
+
+
+def run_benchmark(profiles, prompt, repeats):
+    results = []
+    for profile in profiles:
+        generator = ImageGenerator(sd_profile=profile)
+
+        # La carga del modelo no forma parte de la medición
+        load_start = time.perf_counter()
+        model_registry.get(sd_model_key(profile))
+        load_seconds = time.perf_counter() - load_start
+        print(f"[{profile}] modelo cargado en {load_seconds:.1f}s")
+
+        for platform, (width, height) in ImageGenerator.PLATFORM_SIZES.items():
+            # Se llama directamente al pipeline: generate_image pasaría por la
+            # caché de imágenes y mediría aciertos de caché en vez de inferencia
+            try:
+                # Iteración de calentamiento (compilación, asignación de buffers) fuera de la medición
+                generator._run_stable_diffusion(prompt, width, height)
+            except Exception as e:
+                print(f"[{profile}] {platform}: la generación falló: {e}")
+                continue
+
+            timings = []
+            with PeakRSSSampler() as sampler:
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    generator._run_stable_diffusion(prompt, width, height)
+                    timings.append(time.perf_counter() - start)
+
+            results.append({
+                "profile": profile,
+                "platform": platform,
+                "size": f"{width}x{height}",
+                "seconds_per_image": sum(timings) / len(timings),
+                "peak_rss_mb": sampler.peak_bytes / (1024 * 1024)
+            })
+
+        # Liberar el modelo antes de medir el siguiente perfil
+        model_registry.evict(sd_model_key(profile))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de Stable Diffusion en CPU")
+    parser.add_argument("--profiles", nargs="+", default=list(STABLE_DIFFUSION_PROFILES.keys()),
+                        choices=list(STABLE_DIFFUSION_PROFILES.keys()))
+    parser.add_argument("--prompt", default="a watercolor painting of a lighthouse at sunset")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.profiles, args.prompt, args.repeats)
+
+    print(f"\n{'perfil':<10} {'plataforma':<10} {'tamaño':<10} {'s/imagen':>9} {'pico RSS (MB)':>14}")
+    for row in results:
+        print(
+            f"{row['profile']:<10} {row['platform']:<10} {row['size']:<10} "
+            f"{row['seconds_per_image']:>9.2f} {row['peak_rss_mb']:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -32,4 +32,164 @@ MODEL_SETTINGS = {
 APP_SETTINGS = {
     "title": "Generador de Contenido",
     "description": "Genera contenido personalizado para diferentes plataformas"
-}
\ No newline at end of file
+}
+
+# Registro de modelos compartido por todo el proceso
+MODEL_REGISTRY_SETTINGS = {
+    "idle_timeout": int(os.getenv("MODEL_IDLE_TIMEOUT", 900)),  # segundos sin uso antes de liberar
+    "min_available_memory_mb": int(os.getenv("MODEL_MIN_AVAILABLE_MEMORY_MB", 2048)),
+    "check_interval": int(os.getenv("MODEL_CHECK_INTERVAL", 60))
+}
+
+STABLE_DIFFUSION_SETTINGS = {
+    "model_id": "runwayml/stable-diffusion-v1-5",
+    "warmup": os.getenv("SD_WARMUP", "false").lower() == "true",
+    "profile": os.getenv("SD_PROFILE", "default")
+}
+
+# Perfiles de inferencia de Stable Diffusion
+STABLE_DIFFUSION_PROFILES = {
+    "default": {
+        "scheduler": None,  # Scheduler por defecto del modelo
+        "num_inference_steps": 20,
+        "dtype": "float32",
+        "channels_last": False,
+        "attention_slicing": False,
+        "compile": False,
+        "num_threads": None
+    },
+    "fast-cpu": {
+        "scheduler": "dpm-solver",  # Solver multipaso: buena calidad con pocos pasos
+        "num_inference_steps": 8,
+        "dtype": "bfloat16",  # Se usa float32 si la CPU no soporta bfloat16
+        "channels_last": True,
+        "attention_slicing": True,
+        "compile": os.getenv("SD_TORCH_COMPILE", "false").lower() == "true",
+        "num_threads": int(os.getenv("SD_NUM_THREADS", os.cpu_count() or 1))
+    }
+}
+
+# Directorio base para cachés persistentes
+CACHE_DIR = os.getenv("RUTINA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rutina"))
+
+# Caché de imágenes en disco
+IMAGE_CACHE_SETTINGS = {
+    "enabled": os.getenv("IMAGE_CACHE_ENABLED", "true").lower() == "true",
+    "max_size_mb": int(os.getenv("IMAGE_CACHE_MAX_SIZE_MB", 1024)),
+    # TTL por fuente en segundos (None = sin caducidad)
+    "ttl": {
+        "unsplash": 7 * 24 * 3600,
+        "pixabay": 7 * 24 * 3600,
+        "stock": 7 * 24 * 3600,
+        "stable-diffusion": None,
+        "dall-e": 50 * 60  # Las URLs de DALL-E caducan a la hora
+    }
+}
+
+# Cliente HTTP compartido para las fuentes de datos externas
+HTTP_SETTINGS = {
+    "connect_timeout": float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)),
+    "read_timeout": float(os.getenv("HTTP_READ_TIMEOUT", 30)),
+    "pool_connections": 10,  # Número de hosts con pool propio
+    "pool_maxsize": 10,  # Conexiones keep-alive por host
+    "max_retries": 2
+}
+
+# Búsqueda concurrente en bancos de imágenes
+IMAGE_SOURCE_SETTINGS = {
+    "pixabay_parallel_downloads": 3,  # Candidatos de Pixabay descargados a la vez
+    "hedge_timeout": float(os.getenv("IMAGE_HEDGE_TIMEOUT", 20))  # segundos
+}
+
+# Metadatos de tickers (nombre, mercado, divisa)
+TICKER_METADATA_SETTINGS = {
+    "ttl": 30 * 24 * 3600,  # Los nombres apenas cambian
+    "refresh_workers": 4,
+    "failure_ttl": 3600  # Segundos sin reintentar un símbolo cuya consulta falló
+}
+
+# Caché de datos de mercado según el horario de cada bolsa
+MARKET_CACHE_SETTINGS = {
+    "open_ttl": int(os.getenv("MARKET_CACHE_OPEN_TTL", 60)),  # segundos con la bolsa abierta
+    "stale_ttl": 24 * 3600,  # Margen para servir datos antiguos mientras se refrescan
+    "max_entries": 256
+}
+
+# Noticias financieras (NewsAPI)
+NEWS_SETTINGS = {
+    "ttl": int(os.getenv("NEWS_CACHE_TTL", 15 * 60)),  # NewsAPI tiene un límite de peticiones estricto
+    "page_size": 5,  # Resultados por palabra clave
+    "max_articles": 3  # Artículos tras fusionar todas las palabras clave
+}
+
+# Servicio de traducción compartido
+TRANSLATION_SETTINGS = {
+    "max_chars": 4500  # Límite por petición de Google Translate (5000) con margen
+}
+
+# Pipeline RAG científico
+SCIENTIFIC_RAG_SETTINGS = {
+    "artifact_cache_size": 64  # Consultas cuyos papers y grafo se conservan en memoria
+}
+
+# Almacén local de resultados de arXiv
+ARXIV_STORE_SETTINGS = {
+    "ttl": int(os.getenv("ARXIV_STORE_TTL", 7 * 24 * 3600)),
+    "offline": os.getenv("ARXIV_OFFLINE", "false").lower() == "true"  # Servir solo desde el almacén local
+}
+
+# Índice local de embeddings sobre los abstracts recuperados
+EMBEDDING_INDEX_SETTINGS = {
+    "enabled": os.getenv("EMBEDDING_INDEX_ENABLED", "true").lower() == "true",
+    "model": "sentence-transformers/all-MiniLM-L6-v2",
+    "dim": 384,
+    "min_score": 0.55,  # Similitud coseno mínima para considerar relevante un paper local
+    "ivf_threshold": 50000,  # A partir de este tamaño se construye un índice IVF
+    "nlist": 256,
+    "nprobe": 16
+}
+
+# Presupuesto de tokens para el contexto de papers en los prompts científicos
+CONTEXT_BUDGETS = {
+    "openai": {"gpt-4o-mini": 6000},
+    "groq": {"llama3-8b-8192": 3500},  # Ventana de 8192 tokens: deja sitio a instrucciones y respuesta
+    "default": 3000,
+    "min_tokens_per_paper": 80  # Por debajo de esto se descartan los papers menos relevantes
+}
+
+# Caché de respuestas del LLM (opt-in): coincidencia exacta de proveedor, modelo, mensajes y parámetros
+LLM_CACHE_SETTINGS = {
+    "enabled": os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true",
+    "memory_entries": 256,  # Capacidad del nivel LRU en memoria
+    "ttl": int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))  # Segundos en el nivel SQLite
+}
+
+# Generación por lotes con la API asíncrona de LLMManager
+LLM_BATCH_SETTINGS = {
+    "max_concurrency": int(os.getenv("LLM_BATCH_MAX_CONCURRENCY", 8))  # Llamadas simultáneas al proveedor
+}
+
+# Límites por proveedor/modelo: peticiones y tokens por minuto
+RATE_LIMIT_SETTINGS = {
+    "limits": {
+        "openai": {"gpt-4o-mini": {"rpm": int(os.getenv("OPENAI_RPM", 500)), "tpm": int(os.getenv("OPENAI_TPM", 200000))}},
+        "groq": {"llama3-8b-8192": {"rpm": int(os.getenv("GROQ_RPM", 30)), "tpm": int(os.getenv("GROQ_TPM", 30000))}}
+    },
+    "default_completion_tokens": 1000,  # Estimación de salida si la llamada no fija max_tokens
+    "max_retries": 5,  # Reintentos ante 429
+    "base_delay": 1.0,  # Segundos; crece exponencialmente con jitter
+    "max_delay": 60.0
+}
+
+# Enrutado del proveedor "auto" según latencia y errores recientes
+PROVIDER_ROUTER_SETTINGS = {
+    "providers": ["openai", "groq"],
+    "window": 50,  # Llamadas recientes consideradas por proveedor
+    "min_samples": 5,  # Por debajo, el proveedor se prueba antes de comparar latencias
+    "max_error_rate": 0.5,  # Por encima (o con varios errores seguidos), el proveedor se considera no disponible...
+    "max_consecutive_errors": 3,
+    "cooldown": 30,  # ...durante estos segundos desde su último error
+    "hedge": os.getenv("LLM_HEDGE", "false").lower() == "true",
+    "hedge_after": None,  # Segundos antes de lanzar la petición duplicada (None = p95 del proveedor elegido)
+    "min_hedge_after": 1.0
+}
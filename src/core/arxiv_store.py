@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from config.settings import CACHE_DIR, ARXIV_STORE_SETTINGS
+
+
+def _terms(text):
+    return set(re.findall(r"[a-z0-9]{3,}", text.lower()))
+
+
+class ArxivStore:
+    """
+    Almacén local de resultados de arXiv en SQLite.
+
+    Características:
+    - consulta → IDs de papers y ID → metadatos (título, resumen, autores, url)
+    - TTL configurable para las consultas
+    - Un paper puede pertenecer a varios dominios (tabla paper_domains)
+    - Modo offline: se sirve exclusivamente desde el almacén, con búsqueda
+      por términos sobre los papers ya guardados del mismo dominio
+    """
+
+    def __init__(self, db_path, ttl=7 * 24 * 3600, offline=False):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.ttl = ttl
+        self.offline = offline
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS queries (
+                    query_key TEXT PRIMARY KEY,
+                    domain TEXT NOT NULL,
+                    paper_ids TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS papers (
+                    paper_id TEXT PRIMARY KEY,
+                    domain TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    authors TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS papers_domain ON papers (domain);
+                CREATE TABLE IF NOT EXISTS paper_domains (
+                    paper_id TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    PRIMARY KEY (domain, paper_id)
+                );
+                -- Almacenes anteriores solo guardaban el dominio en papers
+                INSERT OR IGNORE INTO paper_domains SELECT paper_id, domain FROM papers;
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _query_key(domain, query):
+        return f"{domain.lower()}\x00{' '.join(query.lower().split())}"
+
+    @staticmethod
+    def _row_to_paper(row):
+        _, title, summary, authors, url = row
+        return {
+            'title': title,
+            'summary': summary,
+            'authors': json.loads(authors),
+            'url': url
+        }
+
+    def get_papers(self, paper_ids):
+        """
+        Metadatos de los papers indicados, en el mismo orden
+        """
+        if not paper_ids:
+            return []
+        placeholders = ",".join("?" * len(paper_ids))
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT paper_id, title, summary, authors, url FROM papers WHERE paper_id IN ({placeholders})",
+                paper_ids
+            ).fetchall()
+        by_id = {row[0]: self._row_to_paper(row) for row in rows}
+        return [by_id[paper_id] for paper_id in paper_ids if paper_id in by_id]
+
+    def get_query(self, domain, query, max_results):
+        """
+        Papers guardados para la consulta, o None si no hay resultado válido.
+        En modo offline se ignora el TTL.
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT paper_ids, max_results, fetched_at FROM queries WHERE query_key = ?",
+                (self._query_key(domain, query),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        paper_ids, stored_max_results, fetched_at = row
+        paper_ids = json.loads(paper_ids)
+        if not self.offline and time.time() - fetched_at > self.ttl:
+            return None
+        # Una consulta guardada con menos resultados de los pedidos no sirve,
+        # salvo que arXiv ya devolviera todo lo que tenía
+        if stored_max_results < max_results and len(paper_ids) >= stored_max_results:
+            return None
+
+        return self.get_papers(paper_ids[:max_results])
+
+    def put_query(self, domain, query, max_results, papers):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (p['url'], domain, p['title'], p['summary'], json.dumps(p['authors']), p['url'], now)
+                    for p in papers
+                ]
+            )
+            # La pertenencia se acumula: volver a guardar el paper desde otro
+            # dominio no lo saca de los anteriores
+            conn.executemany(
+                "INSERT OR IGNORE INTO paper_domains VALUES (?, ?)",
+                [(p['url'], domain) for p in papers]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?, ?)",
+                (
+                    self._query_key(domain, query),
+                    domain,
+                    json.dumps([p['url'] for p in papers]),
+                    max_results,
+                    now
+                )
+            )
+
+    def search_local(self, domain, query, max_results):
+        """
+        Búsqueda por términos sobre los papers guardados del dominio
+        """
+        query_terms = _terms(query)
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT p.paper_id, p.title, p.summary, p.authors, p.url FROM papers p "
+                "JOIN paper_domains d ON d.paper_id = p.paper_id WHERE d.domain = ?",
+                (domain,)
+            ).fetchall()
+
+        scored = []
+        for row in rows:
+            paper_terms = _terms(f"{row[1]} {row[2]}")
+            score = len(query_terms & paper_terms)
+            if score or not query_terms:
+                scored.append((score, row))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [self._row_to_paper(row) for _, row in scored[:max_results]]
+
+
+_arxiv_store = None
+_arxiv_store_lock = threading.Lock()
+
+
+def get_arxiv_store():
+    """
+    Almacén de arXiv compartido por el proceso
+    """
+    global _arxiv_store
+    with _arxiv_store_lock:
+        if _arxiv_store is None:
+            _arxiv_store = ArxivStore(
+                os.path.join(CACHE_DIR, "arxiv.sqlite3"),
+                **ARXIV_STORE_SETTINGS
+            )
+    return _arxiv_store
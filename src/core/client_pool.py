@@ -0,0 +1,101 @@
+import logging
+import threading
+
+# Los 429 los reintenta RateLimiter (respetando Retry-After); con los reintentos
+# propios del SDK el backoff se duplicaría y saldrían peticiones fuera de presupuesto
+_NO_SDK_RETRIES = {"max_retries": 0}
+
+
+def _openai_client(**config):
+    from openai import OpenAI
+    return OpenAI(**{**_NO_SDK_RETRIES, **config})
+
+
+def _groq_client(**config):
+    from groq import Groq
+    return Groq(**{**_NO_SDK_RETRIES, **config})
+
+
+def _async_openai_client(**config):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(**{**_NO_SDK_RETRIES, **config})
+
+
+def _async_groq_client(**config):
+    from groq import AsyncGroq
+    return AsyncGroq(**{**_NO_SDK_RETRIES, **config})
+
+
+def _langsmith_client(**config):
+    from langsmith import Client
+    return Client(**config)
+
+
+def _langchain_tracer(**config):
+    from langchain.callbacks import LangChainTracer
+    return LangChainTracer(**config)
+
+
+class ClientPool:
+    """
+    Clientes de proveedores compartidos por todo el proceso.
+
+    Características:
+    - Un cliente por (tipo, configuración), creado la primera vez que se pide
+    - Seguro entre hilos: sesiones y reruns de Streamlit reutilizan el mismo
+      cliente y, con él, sus conexiones keep-alive
+    - Las importaciones de cada proveedor se hacen solo al crear su cliente
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._factories = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def register(self, kind, factory):
+        with self._lock:
+            self._factories[kind] = factory
+
+    def get(self, kind, **config):
+        """
+        Cliente compartido para el tipo y la configuración dados
+        """
+        key = (kind, tuple(sorted(config.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if kind not in self._factories:
+                    raise ValueError(f"Tipo de cliente no registrado: {kind}")
+                client = self._factories[kind](**config)
+                self._clients[key] = client
+                self.logger.info(f"Cliente '{kind}' creado")
+        return client
+
+    def create(self, kind, **config):
+        """
+        Cliente nuevo, fuera del pool, para los que no pueden compartirse
+        (p. ej. los asíncronos, ligados al event loop que los usa)
+        """
+        with self._lock:
+            if kind not in self._factories:
+                raise ValueError(f"Tipo de cliente no registrado: {kind}")
+            factory = self._factories[kind]
+        return factory(**config)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+client_pool = ClientPool()
+client_pool.register("openai", _openai_client)
+client_pool.register("groq", _groq_client)
+client_pool.register("openai-async", _async_openai_client)
+client_pool.register("groq-async", _async_groq_client)
+client_pool.register("langsmith", _langsmith_client)
+client_pool.register("langchain-tracer", _langchain_tracer)
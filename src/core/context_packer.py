@@ -0,0 +1,151 @@
+import logging
+import math
+import re
+from typing import List, Dict
+
+from config.settings import CONTEXT_BUDGETS
+
+try:
+    import tiktoken
+except ImportError:  # Sin tiktoken se estima ~4 caracteres por token
+    tiktoken = None
+
+
+def _terms(text):
+    return re.findall(r"[a-z0-9]{3,}", text.lower())
+
+
+def _sentences(text):
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+", text.strip()) if sentence]
+
+
+class ContextPacker:
+    """
+    Empaqueta papers en un presupuesto de tokens para los prompts.
+
+    Características:
+    - Conteo de tokens según proveedor/modelo (tiktoken)
+    - Papers ordenados por relevancia respecto a la consulta
+    - Compresión extractiva de los abstracts cuando se supera el presupuesto
+    """
+
+    def __init__(self, provider, model, budget_tokens=None):
+        self.logger = logging.getLogger(__name__)
+        self.provider = provider
+        self.model = model
+        self.budget_tokens = budget_tokens or CONTEXT_BUDGETS.get(provider, {}).get(
+            model, CONTEXT_BUDGETS["default"]
+        )
+        self.min_tokens_per_paper = CONTEXT_BUDGETS["min_tokens_per_paper"]
+        self._encoding = self._load_encoding()
+
+    def _load_encoding(self):
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                # Modelos sin tokenizador en tiktoken (p. ej. Llama 3 en Groq): aproximación cercana
+                return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken descarga el vocabulario en el primer uso; sin red se estima ~4 caracteres por token
+            self.logger.warning(f"Tokenizador no disponible para {self.model}, usando estimación: {e}")
+            return None
+
+    def count_tokens(self, text):
+        if self._encoding is None:
+            return math.ceil(len(text) / 4)
+        return len(self._encoding.encode(text))
+
+    def _truncate(self, text, max_tokens):
+        if self._encoding is None:
+            return text[:max_tokens * 4]
+        return self._encoding.decode(self._encoding.encode(text)[:max_tokens])
+
+    def rank(self, papers: List[Dict], query: str) -> List[Dict]:
+        """
+        Ordena los papers por relevancia léxica (tipo BM25) con la consulta
+        """
+        query_terms = set(_terms(query))
+        if not query_terms:
+            return list(papers)
+
+        documents = [_terms(f"{p['title']} {p['title']} {p['summary']}") for p in papers]
+        doc_freq = {term: sum(1 for doc in documents if term in doc) for term in query_terms}
+        n = len(documents)
+
+        def score(doc):
+            return sum(
+                math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5)) * doc.count(term)
+                / (doc.count(term) + 1.2)
+                for term in query_terms if term in doc
+            )
+
+        scores = [score(doc) for doc in documents]
+        order = sorted(range(n), key=lambda i: scores[i], reverse=True)
+        return [papers[i] for i in order]
+
+    def _compress(self, summary, query_terms, max_tokens):
+        """
+        Conserva las frases más relevantes (en su orden original) hasta max_tokens
+        """
+        if self.count_tokens(summary) <= max_tokens:
+            return summary
+
+        sentences = _sentences(summary)
+        scored = sorted(
+            range(len(sentences)),
+            key=lambda i: (len(query_terms & set(_terms(sentences[i]))) + (1 if i == 0 else 0), -i),
+            reverse=True
+        )
+
+        selected, used = set(), 0
+        for i in scored:
+            tokens = self.count_tokens(sentences[i])
+            if used + tokens > max_tokens:
+                continue
+            selected.add(i)
+            used += tokens
+
+        if not selected:
+            return self._truncate(summary, max_tokens)
+        return " ".join(sentences[i] for i in sorted(selected))
+
+    def pack(self, papers: List[Dict], query: str) -> List[Dict]:
+        """
+        Papers ordenados por relevancia cuyo texto cabe en el presupuesto.
+        Los abstracts se comprimen de forma extractiva si hace falta y, si ni
+        así caben, se descartan los menos relevantes.
+        """
+        ranked = self.rank(papers, query)
+        if not ranked:
+            return []
+
+        def paper_tokens(paper):
+            return self.count_tokens(f"Paper: {paper['title']}\nSummary: {paper['summary']}")
+
+        total = sum(paper_tokens(p) for p in ranked)
+        if total <= self.budget_tokens:
+            return ranked
+
+        # Con presupuesto insuficiente para todos, quedarse con los más relevantes
+        max_papers = max(1, self.budget_tokens // self.min_tokens_per_paper)
+        ranked = ranked[:max_papers]
+
+        query_terms = set(_terms(query))
+        packed = []
+        remaining = self.budget_tokens
+        for i, paper in enumerate(ranked):
+            # Reparto equitativo; lo que no usa un paper corto pasa a los siguientes
+            share = remaining // (len(ranked) - i)
+            overhead = self.count_tokens(f"Paper: {paper['title']}\nSummary: ")
+            summary = self._compress(paper['summary'], query_terms, max(share - overhead, 0))
+            packed.append({**paper, 'summary': summary})
+            remaining -= overhead + self.count_tokens(summary)
+
+        self.logger.info(
+            f"Contexto empaquetado: {len(packed)}/{len(papers)} papers, "
+            f"{self.budget_tokens - remaining}/{self.budget_tokens} tokens (original {total})"
+        )
+        return packed
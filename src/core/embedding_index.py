@@ -0,0 +1,254 @@
+import logging
+import os
+import threading
+
+import numpy as np
+
+from config.settings import CACHE_DIR, EMBEDDING_INDEX_SETTINGS
+from core.model_registry import model_registry
+
+EMBEDDER_KEY = "sentence-embedder"
+
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_INDEX_SETTINGS["model"], device="cpu")
+
+
+model_registry.register(EMBEDDER_KEY, _load_embedder)
+
+
+def embed_texts(texts):
+    """
+    Embeddings normalizados (float32) con el modelo compartido del registro
+    """
+    with model_registry.use(EMBEDDER_KEY) as model:
+        embeddings = model.encode(
+            list(texts),
+            batch_size=32,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingIndex:
+    """
+    Índice vectorial local con almacenamiento mapeado en memoria.
+
+    Características:
+    - Matriz NumPy float32 en disco (vectors.f32) que solo crece por el final
+    - IDs en un fichero de texto paralelo, uno por línea
+    - Búsqueda exacta por fuerza bruta (coseno) en bloques
+    - Índice IVF (k-means esférico) a partir de cierto tamaño
+    """
+
+    _CHUNK_ROWS = 65536
+
+    def __init__(self, index_dir, dim, ivf_threshold=50000, nlist=256, nprobe=16):
+        self.logger = logging.getLogger(__name__)
+        self.index_dir = index_dir
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nlist = nlist
+        self.nprobe = nprobe
+
+        self._vectors_path = os.path.join(index_dir, "vectors.f32")
+        self._ids_path = os.path.join(index_dir, "ids.txt")
+        self._ivf_path = os.path.join(index_dir, "ivf.npz")
+        self._lock = threading.Lock()
+        self._matrix = None
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._ids = []
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, encoding="utf-8") as f:
+                self._ids = [line.rstrip("\n") for line in f if line.strip()]
+
+        # Tras una escritura interrumpida solo cuentan las filas presentes en ambos ficheros;
+        # las filas huérfanas se recortan para que las siguientes escrituras queden alineadas
+        stored_rows = 0
+        if os.path.exists(self._vectors_path):
+            stored_rows = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._ids = self._ids[:stored_rows]
+        if stored_rows > len(self._ids):
+            os.truncate(self._vectors_path, len(self._ids) * self.dim * 4)
+        self._id_set = set(self._ids)
+
+        self._centroids = None
+        self._assignments = None
+        self._lists = None
+        if os.path.exists(self._ivf_path):
+            ivf = np.load(self._ivf_path)
+            if len(ivf["assignments"]) == len(self._ids):
+                self._centroids = ivf["centroids"]
+                self._assignments = ivf["assignments"]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, item_id):
+        return item_id in self._id_set
+
+    def _load_matrix(self):
+        n = len(self._ids)
+        if n == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._matrix is None or self._matrix.shape[0] != n:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        return self._matrix
+
+    def add(self, ids, vectors):
+        """
+        Añade vectores de forma incremental; los IDs ya indexados se ignoran.
+        Devuelve el número de vectores añadidos.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+        with self._lock:
+            new_ids, new_rows, seen = [], [], set()
+            for item_id, vector in zip(ids, vectors):
+                if item_id in self._id_set or item_id in seen:
+                    continue
+                seen.add(item_id)
+                new_ids.append(item_id)
+                new_rows.append(vector)
+            if not new_ids:
+                return 0
+
+            matrix = _normalize(np.stack(new_rows)).astype(np.float32)
+
+            # Primero los vectores y después los IDs: un corte deja filas huérfanas, nunca IDs sin vector
+            with open(self._vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self._ids_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{item_id}\n" for item_id in new_ids))
+
+            self._ids.extend(new_ids)
+            self._id_set.update(new_ids)
+            self._matrix = None
+
+            if self._centroids is not None:
+                # Asignar los nuevos vectores a su lista IVF más cercana
+                new_assignments = np.argmax(matrix @ self._centroids.T, axis=1).astype(np.int32)
+                self._assignments = np.concatenate([self._assignments, new_assignments])
+                self._lists = None
+                self._save_ivf()
+            elif len(self._ids) >= self.ivf_threshold:
+                self._build_ivf()
+
+        return len(new_ids)
+
+    def build_ivf(self, nlist=None, iterations=10):
+        with self._lock:
+            self._build_ivf(nlist, iterations)
+
+    def _build_ivf(self, nlist=None, iterations=10):
+        """
+        K-means esférico sobre una muestra y asignación de todas las filas
+        """
+        matrix = self._load_matrix()
+        n = matrix.shape[0]
+        nlist = min(nlist or self.nlist, n)
+        rng = np.random.default_rng(0)
+
+        sample_rows = np.sort(rng.choice(n, size=min(n, nlist * 64), replace=False))
+        sample = np.asarray(matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            # Los centroides sin miembros se conservan
+            non_empty = counts > 0
+            centroids[non_empty] = _normalize(sums[non_empty])
+
+        assignments = np.empty(n, dtype=np.int32)
+        for start in range(0, n, self._CHUNK_ROWS):
+            block = matrix[start:start + self._CHUNK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = assignments
+        self._lists = None
+        self._save_ivf()
+        self.logger.info(f"Índice IVF construido: {n} vectores en {nlist} listas")
+
+    def _save_ivf(self):
+        tmp_path = f"{self._ivf_path}.tmp.npz"
+        np.savez(tmp_path, centroids=self._centroids, assignments=self._assignments)
+        os.replace(tmp_path, self._ivf_path)
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            bounds = np.searchsorted(self._assignments[order], np.arange(len(self._centroids) + 1))
+            self._lists = (order, bounds)
+        return self._lists
+
+    def search(self, query_vector, k=5):
+        """
+        Los k vectores más similares (coseno) como [(id, score)], de mayor a menor
+        """
+        matrix = self._load_matrix()
+        n = matrix.shape[0]
+        if n == 0:
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+
+        if self._centroids is not None and len(self._assignments) == n:
+            # IVF: solo se puntúan las listas de los centroides más cercanos
+            order, bounds = self._inverted_lists()
+            nprobe = min(self.nprobe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.sort(np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe]))
+            scores = matrix[rows] @ query if len(rows) else np.empty(0, dtype=np.float32)
+        else:
+            rows = None
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, self._CHUNK_ROWS):
+                block = matrix[start:start + self._CHUNK_ROWS]
+                scores[start:start + len(block)] = block @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self._ids[rows[i] if rows is not None else i], float(scores[i]))
+            for i in top
+        ]
+
+
+_embedding_index = None
+_embedding_index_lock = threading.Lock()
+
+
+def get_embedding_index():
+    """
+    Índice de embeddings compartido por el proceso (None si está desactivado)
+    """
+    global _embedding_index
+    if not EMBEDDING_INDEX_SETTINGS["enabled"]:
+        return None
+
+    with _embedding_index_lock:
+        if _embedding_index is None:
+            _embedding_index = EmbeddingIndex(
+                os.path.join(CACHE_DIR, "embedding_index"),
+                dim=EMBEDDING_INDEX_SETTINGS["dim"],
+                ivf_threshold=EMBEDDING_INDEX_SETTINGS["ivf_threshold"],
+                nlist=EMBEDDING_INDEX_SETTINGS["nlist"],
+                nprobe=EMBEDDING_INDEX_SETTINGS["nprobe"]
+            )
+    return _embedding_index
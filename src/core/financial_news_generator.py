@@ -1,56 +1,171 @@
 from dotenv import load_dotenv
 import yfinance as yf
-import requests
+import pandas as pd
 import os
-from deep_translator import GoogleTranslator
+from concurrent.futures import ThreadPoolExecutor
 from langsmith import traceable
-
+from core.http_client import get_http_client
+from core.ticker_metadata import get_ticker_metadata_store
+from core.market_cache import market_data_cache, market_ttl
+from core.translation_service import LANGUAGE_CODES, get_translation_service
+from config.settings import NEWS_SETTINGS
 
 
 class FinancialNewsGenerator:
+    # Componentes principales de cada índice
+    MARKET_COMPONENTS = {
+        "^DJI": ["AAPL", "AMGN", "AXP", "BA", "CAT", "CRM", "CSCO", 
+                "CVX", "DIS", "DOW", "GS", "HD", "HON", "IBM", 
+                "INTC", "JNJ", "JPM", "KO", "MCD", "MMM", "MRK", 
+                "MSFT", "NKE", "PG", "TRV", "UNH", "V", "VZ", "WBA", "WMT"],
+        "^GSPC": ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "TSLA", "GOOG", "UNH", "XOM"],
+        "^IXIC": ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "TSLA", "INTC", "CSCO", "AMD"],
+        "^FTSE": ["SHEL", "HSBA", "LSEG", "AZN", "BP", "GSK", "ULVR", "RIO", "REL", "DGE"],
+        "^N225": ["7203.T", "9984.T", "7267.T", "9433.T", "6758.T"]
+    }
+
+    # ETF que replica cada índice
+    ETF_MAP = {
+        "^GSPC": "SPY",
+        "^IXIC": "QQQ",
+        "^DJI": "DIA",
+        "^FTSE": "VUKE",
+        "^N225": "HJPX"
+    }
+
+    # Bolsa de cada índice, para ajustar la caché a su horario
+    MARKET_EXCHANGES = {
+        "^GSPC": "NYSE",
+        "^IXIC": "NASDAQ",
+        "^DJI": "NYSE",
+        "^FTSE": "LSE",
+        "^N225": "TSE"
+    }
+
+    # Palabras clave de búsqueda para cada mercado
+    MARKET_KEYWORDS = {
+        "S&P 500": ["S&P 500", "stock market", "wall street", "US stocks"],
+        "NASDAQ Composite": ["NASDAQ", "tech stocks", "technology market", "silicon valley"],
+        "Dow Jones": ["Dow Jones", "industrial stocks", "US market"],
+        "FTSE 100": ["FTSE 100", "UK stock market", "London stock exchange"],
+        "Nikkei 225": ["Nikkei 225", "Japanese stock market", "Tokyo stocks"]
+    }
+
     def __init__(self):
         load_dotenv()
         self.alpha_vantage_api_key = os.getenv("ALPHA_VANTAGE_KEY")
         if not self.alpha_vantage_api_key:
             raise ValueError("La clave de Alpha Vantage (ALPHA_VANTAGE_KEY) no está definida en el archivo .env.")
+        
+        self.news_api_key = os.getenv("NEWSAPI_KEY")
+        
+        # Cliente HTTP compartido (pool de conexiones keep-alive)
+        self.http = get_http_client()
+        
+        # Metadatos persistentes; se pre-cargan todos los componentes conocidos
+        self.ticker_metadata = get_ticker_metadata_store()
+        self.ticker_metadata.preseed(
+            symbol for components in self.MARKET_COMPONENTS.values() for symbol in components
+        )
+
+    def _components_for(self, ticker):
+        """
+        Componentes de un índice, aceptando tanto el índice como su ETF
+        """
+        if ticker in self.MARKET_COMPONENTS:
+            return self.MARKET_COMPONENTS[ticker]
+        for index_ticker, etf_ticker in self.ETF_MAP.items():
+            if etf_ticker == ticker:
+                return self.MARKET_COMPONENTS.get(index_ticker, [])
+        return []
+
+    def _download_quotes(self, symbols):
+        """
+        Una sola llamada a yf.download para todos los símbolos (internamente
+        una petición por símbolo, en paralelo con threads=True).
+        Devuelve un DataFrame indexado por símbolo con price, change y change_percent.
+        """
+        data = yf.download(
+            symbols,
+            period="1d",
+            group_by="column",
+            auto_adjust=False,
+            progress=False,
+            threads=True
+        )
+        if data.empty:
+            return pd.DataFrame(columns=["price", "change", "change_percent"])
+        
+        # Con un solo símbolo yfinance puede devolver columnas sin nivel de ticker
+        if not isinstance(data.columns, pd.MultiIndex):
+            data.columns = pd.MultiIndex.from_product([data.columns, symbols])
+        
+        # Apertura del primer registro válido y cierre del último, por columna
+        opens = data["Open"].bfill().iloc[0]
+        closes = data["Close"].ffill().iloc[-1]
+        
+        quotes = pd.DataFrame({
+            "price": closes,
+            "change": closes - opens,
+            "change_percent": (closes / opens - 1) * 100
+        })
+        return quotes.dropna()
+
+    def _get_company_names(self, symbols):
+        # Nunca bloquea: los nombres desconocidos se resuelven en segundo plano
+        return self.ticker_metadata.get_names(symbols)
+
+    @traceable(name="get_top_stocks_for_markets")
+    def get_top_stocks_for_markets(self, market_tickers, top_n=5):
+        """
+        Acciones más destacadas de varios mercados con una sola descarga.
+        Los símbolos compartidos entre índices se piden una única vez.
+        Devuelve {mercado: [acciones]}.
+        """
+        components = {ticker: self._components_for(ticker) for ticker in market_tickers}
+        symbols = list(dict.fromkeys(
+            symbol for market_symbols in components.values() for symbol in market_symbols
+        ))
+        if not symbols:
+            return {ticker: [] for ticker in market_tickers}
+        
+        quotes = self._download_quotes(symbols)
+        
+        # Descartar variaciones anómalas y ordenar por magnitud del cambio
+        quotes = quotes[quotes["change_percent"].abs() < 20]
+        quotes = quotes.assign(abs_change=quotes["change_percent"].abs())
+        
+        top_by_market = {
+            ticker: quotes.loc[quotes.index.intersection(market_symbols)]
+                .sort_values("abs_change", ascending=False)
+                .head(top_n)
+            for ticker, market_symbols in components.items()
+        }
+        
+        # Los nombres solo se piden para las acciones que se van a mostrar
+        top_symbols = list(dict.fromkeys(
+            symbol for top in top_by_market.values() for symbol in top.index
+        ))
+        names = self._get_company_names(top_symbols)
+        
+        return {
+            ticker: [
+                {
+                    "symbol": symbol,
+                    "name": names.get(symbol, symbol),
+                    "price": row["price"],
+                    "change": row["change"],
+                    "change_percent": row["change_percent"]
+                }
+                for symbol, row in top.iterrows()
+            ]
+            for ticker, top in top_by_market.items()
+        }
     
     @traceable(name="get_top_stocks_from_yahoo")
     def get_top_stocks_from_yahoo(self, etf_ticker, top_n=5):
         try:
-            market_components = {
-                "^DJI": ["AAPL", "AMGN", "AXP", "BA", "CAT", "CRM", "CSCO", 
-                        "CVX", "DIS", "DOW", "GS", "HD", "HON", "IBM", 
-                        "INTC", "JNJ", "JPM", "KO", "MCD", "MMM", "MRK", 
-                        "MSFT", "NKE", "PG", "TRV", "UNH", "V", "VZ", "WBA", "WMT"],
-                "^GSPC": ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "TSLA", "GOOG", "UNH", "XOM"],
-                "^IXIC": ["AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "TSLA", "INTC", "CSCO", "AMD"],
-                "^FTSE": ["SHEL", "HSBA", "LSEG", "AZN", "BP", "GSK", "ULVR", "RIO", "REL", "DGE"],
-                "^N225": ["7203.T", "9984.T", "7267.T", "9433.T", "6758.T"]
-            }
-
-            components = market_components.get(etf_ticker, [])
-            top_stocks = []
-
-            for stock_symbol in components:
-                stock = yf.Ticker(stock_symbol)
-                hist = stock.history(period="1d")
-                if not hist.empty:
-                    stock_info = {
-                        "symbol": stock_symbol,
-                        "name": stock.info.get('longName', stock_symbol),
-                        "price": hist['Close'].iloc[-1],
-                        "change": hist['Close'].iloc[-1] - hist['Open'].iloc[0],
-                        "change_percent": ((hist['Close'].iloc[-1] / hist['Open'].iloc[0]) - 1) * 100
-                    }
-                    top_stocks.append(stock_info)
-
-            filtered_stocks = [
-                stock for stock in top_stocks 
-                if abs(stock['change_percent']) < 20
-            ]
-
-            filtered_stocks.sort(key=lambda x: abs(x['change_percent']), reverse=True)
-            return filtered_stocks[:top_n]
+            return self.get_top_stocks_for_markets([etf_ticker], top_n)[etf_ticker]
         except Exception as e:
             print(f"Error fetching data from Yahoo Finance: {e}")
             return []
@@ -63,7 +178,7 @@ class FinancialNewsGenerator:
                 "function": "TOP_GAINERS_LOSERS",
                 "apikey": self.alpha_vantage_api_key
             }
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             data = response.json()
 
             if "top_gainers" in data:
@@ -87,14 +202,14 @@ class FinancialNewsGenerator:
 
     @traceable(name="get_top_stocks_from_market")
     def get_top_stocks_from_market(self, market_ticker, top_n=5):
-        etf_map = {
-            "^GSPC": "SPY",
-            "^IXIC": "QQQ",
-            "^DJI": "DIA",
-            "^FTSE": "VUKE",
-            "^N225": "HJPX"
-        }
-        etf_ticker = etf_map.get(market_ticker, market_ticker)
+        return market_data_cache.get_or_fetch(
+            ("top_stocks", market_ticker, top_n),
+            lambda: self._fetch_top_stocks_from_market(market_ticker, top_n),
+            ttl=lambda: market_ttl(self.MARKET_EXCHANGES.get(market_ticker))
+        )
+
+    def _fetch_top_stocks_from_market(self, market_ticker, top_n=5):
+        etf_ticker = self.ETF_MAP.get(market_ticker, market_ticker)
 
         yahoo_stocks = self.get_top_stocks_from_yahoo(etf_ticker, top_n)
         if yahoo_stocks:
@@ -111,6 +226,13 @@ class FinancialNewsGenerator:
 
     @traceable(name="get_market_performance")
     def get_market_performance(self, market_ticker):
+        return market_data_cache.get_or_fetch(
+            ("performance", market_ticker),
+            lambda: self._fetch_market_performance(market_ticker),
+            ttl=lambda: market_ttl(self.MARKET_EXCHANGES.get(market_ticker))
+        )
+
+    def _fetch_market_performance(self, market_ticker):
         try:
             market = yf.Ticker(market_ticker)
             historical_data = market.history(period="1d")
@@ -159,86 +281,105 @@ class FinancialNewsGenerator:
 
     @traceable(name="get_financial_news")
     def get_financial_news(self, market_name, language="english"):
-        load_dotenv()
-        news_api_key = os.getenv("NEWSAPI_KEY")
-        
-        if not news_api_key:
+        if not self.news_api_key:
             raise ValueError("NewsAPI key (NEWSAPI_KEY) is not defined in .env file")
         
-        market_keywords = {
-            "S&P 500": ["S&P 500", "stock market", "wall street", "US stocks"],
-            "NASDAQ Composite": ["NASDAQ", "tech stocks", "technology market", "silicon valley"],
-            "Dow Jones": ["Dow Jones", "industrial stocks", "US market"],
-            "FTSE 100": ["FTSE 100", "UK stock market", "London stock exchange"],
-            "Nikkei 225": ["Nikkei 225", "Japanese stock market", "Tokyo stocks"]
-        }
+        # Noticias fusionadas en inglés, cacheadas por mercado
+        news_articles = market_data_cache.get_or_fetch(
+            ("news", market_name),
+            lambda: self._fetch_market_news(market_name),
+            ttl=NEWS_SETTINGS["ttl"]
+        )
+        
+        if news_articles:
+            return self.translate_news_articles(news_articles, language)
+        return []
+
+    def _fetch_market_news(self, market_name):
+        """
+        Consulta todas las palabras clave del mercado a la vez y fusiona los
+        resultados sin duplicados, del más reciente al más antiguo
+        """
+        keywords = self.MARKET_KEYWORDS.get(market_name, ["stock market"])
         
-        keywords = market_keywords.get(market_name, ["stock market"])
+        with ThreadPoolExecutor(max_workers=len(keywords)) as executor:
+            results = list(executor.map(self._fetch_news_for_keyword, keywords))
         
-        for keyword in keywords:
-            url = "https://newsapi.org/v2/everything"
-            params = {
-                "apiKey": news_api_key,
-                "q": keyword,
-                "language": "en",
-                "sortBy": "publishedAt",
-                "pageSize": 5
-            }
+        merged = []
+        seen_urls = set()
+        seen_titles = set()
+        for articles in results:
+            for article in articles:
+                title_key = " ".join(article["title"].lower().split())
+                if article["url"] in seen_urls or title_key in seen_titles:
+                    continue
+                seen_urls.add(article["url"])
+                seen_titles.add(title_key)
+                merged.append(article)
+        
+        # Las fechas ISO 8601 de NewsAPI se ordenan correctamente como texto
+        merged.sort(key=lambda article: article["publishedAt"], reverse=True)
+        return merged[:NEWS_SETTINGS["max_articles"]]
+
+    def _fetch_news_for_keyword(self, keyword):
+        url = "https://newsapi.org/v2/everything"
+        params = {
+            "apiKey": self.news_api_key,
+            "q": keyword,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": NEWS_SETTINGS["page_size"]
+        }
+        
+        try:
+            response = self.http.get(url, params=params)
+            data = response.json()
             
-            try:
-                response = requests.get(url, params=params)
-                data = response.json()
-                
-                if data.get("status") == "ok" and data.get("totalResults", 0) > 0:
-                    news_articles = []
-                    for article in data.get("articles", [])[:3]:
-                        if article.get("title") and article.get("description"):
-                            news_articles.append({
-                                "title": article.get("title", ""),
-                                "description": article.get("description", ""),
-                                "url": article.get("url", ""),
-                                "source": article.get("source", {}).get("name", ""),
-                                "publishedAt": article.get("publishedAt", "")
-                            })
-                    
-                    if news_articles:
-                        translated_articles = self.translate_news_articles(news_articles, language)
-                        return translated_articles
+            if data.get("status") != "ok":
+                print(f"NewsAPI error for {keyword}: {data.get('message', data.get('status'))}")
+                return []
             
-            except Exception as e:
-                print(f"Error fetching news for {keyword}: {e}")
+            return [
+                {
+                    "title": article.get("title", ""),
+                    "description": article.get("description", ""),
+                    "url": article.get("url", ""),
+                    "source": article.get("source", {}).get("name", ""),
+                    "publishedAt": article.get("publishedAt", "")
+                }
+                for article in data.get("articles", [])
+                if article.get("title") and article.get("description")
+            ]
         
-        return []
+        except Exception as e:
+            print(f"Error fetching news for {keyword}: {e}")
+            return []
 
     @traceable(name="translate_news_articles")
     def translate_news_articles(self, articles, target_language):
-        language_map = {
-            "castellano": "es",
-            "english": "en",
-            "français": "fr",
-            "italiano": "it"
-        }
-        
-        target_lang_code = language_map.get(target_language, "en")
+        target_lang_code = LANGUAGE_CODES.get(target_language, "en")
         
         if target_lang_code != "en":
-            translated_articles = []
-            
-            for article in articles:
-                try:
-                    translated_title = GoogleTranslator(source='auto', target=target_lang_code).translate(article['title'])
-                    translated_description = GoogleTranslator(source='auto', target=target_lang_code).translate(article['description'])
-                    
-                    translated_articles.append({
-                        "title": translated_title,
-                        "description": translated_description,
-                        "url": article['url'],
-                        "source": article['source']
-                    })
-                except Exception as e:
-                    print(f"Translation error: {e}")
-                    translated_articles.append(article)
+            # Títulos y descripciones de todos los artículos en una sola petición
+            texts = [
+                text for article in articles
+                for text in (article['title'], article['description'])
+            ]
+            try:
+                translated = get_translation_service().translate_batch(texts, target_lang_code, source="en")
+            except Exception as e:
+                print(f"Translation error: {e}")
+                return articles
             
-            return translated_articles
+            return [
+                {
+                    "title": translated[2 * i],
+                    "description": translated[2 * i + 1],
+                    "url": article['url'],
+                    "source": article['source'],
+                    "publishedAt": article.get('publishedAt', "")
+                }
+                for i, article in enumerate(articles)
+            ]
         
-        return articles
\ No newline at end of file
+        return articles
@@ -0,0 +1,109 @@
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import HTTP_SETTINGS
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartido por las fuentes de datos externas.
+
+    Características:
+    - Pool de conexiones keep-alive por host (se evita repetir TCP+TLS)
+    - Timeouts de conexión y lectura configurables
+    - Respuestas comprimidas con gzip
+    - Métricas de reutilización de conexiones
+    """
+
+    def __init__(self, connect_timeout=5, read_timeout=30, pool_connections=10, pool_maxsize=10, max_retries=2):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET"])
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+
+        self._requests_by_host = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """
+        GET sobre la sesión compartida; usa los timeouts por defecto si no se indican
+        """
+        with self._lock:
+            self._requests_by_host[urlsplit(url).hostname] += 1
+        return self.session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+
+    def metrics(self):
+        """
+        Peticiones y conexiones abiertas por host. Las conexiones reutilizadas
+        son las peticiones que no necesitaron un nuevo handshake.
+        """
+        pools = self.adapter.poolmanager.pools
+        connections_by_host = defaultdict(int)
+        pool_requests_by_host = defaultdict(int)
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            connections_by_host[pool.host] += pool.num_connections
+            pool_requests_by_host[pool.host] += pool.num_requests
+
+        with self._lock:
+            requests_by_host = dict(self._requests_by_host)
+
+        hosts = {}
+        for host, count in requests_by_host.items():
+            connections = connections_by_host.get(host, 0)
+            served = pool_requests_by_host.get(host, 0)
+            hosts[host] = {
+                "requests": count,
+                "connections_opened": connections,
+                "connections_reused": max(served - connections, 0)
+            }
+
+        total_requests = sum(pool_requests_by_host.values())
+        total_connections = sum(connections_by_host.values())
+        return {
+            "hosts": hosts,
+            "requests": total_requests,
+            "connections_opened": total_connections,
+            "reuse_ratio": 1 - total_connections / total_requests if total_requests else 0.0
+        }
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Cliente HTTP compartido por el proceso
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient(**HTTP_SETTINGS)
+    return _http_client
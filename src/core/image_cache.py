@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from config.settings import CACHE_DIR, IMAGE_CACHE_SETTINGS
+
+
+class ImageCache:
+    """
+    Caché persistente de imágenes direccionada por contenido.
+
+    Características:
+    - Clave derivada de (generador, prompt normalizado, ancho, alto, parámetros)
+    - Bytes de imagen en disco e índice en SQLite
+    - Límite de tamaño con expulsión LRU
+    - TTL por fuente y contadores de aciertos/fallos
+    """
+
+    def __init__(self, cache_dir, max_size_mb=1024, ttl=None):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.ttl = ttl or {}
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._db_path = os.path.join(self.cache_dir, "index.sqlite3")
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS images (
+                    key TEXT PRIMARY KEY,
+                    generator TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self._db_path, timeout=30)
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    @staticmethod
+    def make_key(generator, prompt, width, height, **params):
+        """
+        Clave estable: el prompt se normaliza para que variaciones de
+        mayúsculas o espacios compartan entrada
+        """
+        normalized_prompt = " ".join((prompt or "").lower().split())
+        payload = json.dumps(
+            {
+                "generator": generator,
+                "prompt": normalized_prompt,
+                "width": width,
+                "height": height,
+                "params": params
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Devuelve los bytes de la imagen (o la URL para fuentes que devuelven
+        URLs) o None si no está o ha caducado
+        """
+        with self._lock:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT generator, kind, created_at FROM images WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                generator, kind, created_at = row
+                ttl = self.ttl.get(generator)
+                path = self._path_for(key)
+                if (ttl is not None and time.time() - created_at > ttl) or not os.path.exists(path):
+                    self._delete(conn, key)
+                    self.misses += 1
+                    return None
+
+                conn.execute("UPDATE images SET last_access = ? WHERE key = ?", (time.time(), key))
+
+            with open(path, "rb") as f:
+                data = f.read()
+            self.hits += 1
+
+        return data.decode("utf-8") if kind == "url" else data
+
+    def put(self, key, generator, payload):
+        """
+        Guarda la imagen (bytes) o la URL (str) y aplica el límite de tamaño
+        """
+        kind = "url" if isinstance(payload, str) else "bytes"
+        data = payload.encode("utf-8") if kind == "url" else payload
+
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._lock:
+            # Escritura atómica para no dejar ficheros a medias
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            now = time.time()
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, generator, kind, len(data), now, now)
+                )
+                self._evict_lru(conn)
+
+    def _delete(self, conn, key):
+        conn.execute("DELETE FROM images WHERE key = ?", (key,))
+        try:
+            os.remove(self._path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict_lru(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        for key, size in conn.execute(
+            "SELECT key, size FROM images ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_size_bytes:
+                break
+            self._delete(conn, key)
+            total -= size
+            self.logger.info(f"Imagen {key[:12]} expulsada de la caché (LRU)")
+
+    def stats(self):
+        with closing(self._connect()) as conn, conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_mb": size / (1024 * 1024)
+        }
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """
+    Caché de imágenes compartida por el proceso (None si está desactivada)
+    """
+    global _image_cache
+    if not IMAGE_CACHE_SETTINGS["enabled"]:
+        return None
+
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache(
+                os.path.join(CACHE_DIR, "images"),
+                max_size_mb=IMAGE_CACHE_SETTINGS["max_size_mb"],
+                ttl=IMAGE_CACHE_SETTINGS["ttl"]
+            )
+    return _image_cache
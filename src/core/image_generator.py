@@ -1,18 +1,125 @@
 import os
 import logging
-import torch
 import io
-import requests
-from PIL import Image
-from diffusers import StableDiffusionPipeline
-from openai import OpenAI
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from PIL import Image, ImageOps
 from dotenv import load_dotenv
-from langsmith import Client, traceable
+from langsmith import traceable
+from langsmith.utils import ContextThreadPoolExecutor  # Mantiene el contexto de trazas entre hilos
+from config.settings import STABLE_DIFFUSION_SETTINGS, STABLE_DIFFUSION_PROFILES, IMAGE_SOURCE_SETTINGS
+from core.model_registry import model_registry
+from core.image_cache import get_image_cache
+from core.http_client import get_http_client
+from core.client_pool import client_pool
 
 
 # Cargar variables de entorno
 load_dotenv()
 
+STABLE_DIFFUSION_KEY = "stable-diffusion"
+
+
+class _Cancellation:
+    """
+    Señal de cancelación para tareas concurrentes; también se activa si
+    lo hace la del nivel superior (p. ej. descargas de Pixabay dentro de la
+    búsqueda combinada de stock)
+    """
+
+    def __init__(self, parent=None):
+        self._event = threading.Event()
+        self._parent = parent
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self):
+        return self._event.is_set() or (self._parent is not None and self._parent.is_set())
+
+# Schedulers de pocos pasos disponibles para los perfiles de inferencia
+SD_SCHEDULERS = {
+    "dpm-solver": "DPMSolverMultistepScheduler",
+    "unipc": "UniPCMultistepScheduler",
+    "euler-a": "EulerAncestralDiscreteScheduler"
+}
+
+
+def _resolve_dtype(torch, dtype_name):
+    """
+    Devuelve el dtype pedido, con float32 como respaldo si la CPU no soporta bfloat16
+    """
+    if dtype_name == "bfloat16":
+        bf16_supported = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+        if bf16_supported is not None and bf16_supported():
+            return torch.bfloat16
+        logging.getLogger(__name__).warning("bfloat16 no soportado en esta CPU, usando float32")
+    return torch.float32
+
+
+def _load_stable_diffusion(profile_name):
+    """
+    Carga el pipeline de Stable Diffusion en CPU con el perfil indicado (solo en el primer uso)
+    """
+    import torch
+    import diffusers
+
+    profile = STABLE_DIFFUSION_PROFILES[profile_name]
+
+    # Hilos intra-op/inter-op explícitos (son globales al proceso)
+    if profile["num_threads"]:
+        torch.set_num_threads(profile["num_threads"])
+        try:
+            torch.set_num_interop_threads(max(1, profile["num_threads"] // 2))
+        except RuntimeError:
+            pass  # Solo puede fijarse antes del primer trabajo paralelo
+
+    pipeline = diffusers.StableDiffusionPipeline.from_pretrained(
+        STABLE_DIFFUSION_SETTINGS["model_id"],
+        torch_dtype=_resolve_dtype(torch, profile["dtype"]),
+        safety_checker=None
+    )
+    pipeline = pipeline.to("cpu")
+
+    if profile["scheduler"]:
+        scheduler_cls = getattr(diffusers, SD_SCHEDULERS[profile["scheduler"]])
+        pipeline.scheduler = scheduler_cls.from_config(pipeline.scheduler.config)
+
+    if profile["channels_last"]:
+        pipeline.unet.to(memory_format=torch.channels_last)
+        pipeline.vae.to(memory_format=torch.channels_last)
+
+    if profile["attention_slicing"]:
+        pipeline.enable_attention_slicing()
+
+    if profile["compile"]:
+        pipeline.unet = torch.compile(pipeline.unet)
+
+    return pipeline
+
+
+def _warmup_stable_diffusion(pipeline):
+    """
+    Inferencia mínima para que la primera petición real no pague la inicialización
+    """
+    pipeline(prompt="warm-up", num_inference_steps=1, width=256, height=256)
+
+
+def sd_model_key(profile_name):
+    return f"{STABLE_DIFFUSION_KEY}:{profile_name}"
+
+
+# Un modelo por perfil: cada perfil tiene su propio dtype y scheduler
+for _profile_name in STABLE_DIFFUSION_PROFILES:
+    model_registry.register(
+        sd_model_key(_profile_name),
+        functools.partial(_load_stable_diffusion, _profile_name),
+        warmup=_warmup_stable_diffusion if STABLE_DIFFUSION_SETTINGS["warmup"] else None
+    )
+
+
 class ImageGenerator:
     # Definir dimensiones específicas para cada plataforma
     PLATFORM_SIZES = {
@@ -22,7 +129,7 @@ class ImageGenerator:
         'twitter': (1200, 672)     # Ajustado para ser divisible por 8
     }
 
-    def __init__(self, huggingface_token=None):
+    def __init__(self, huggingface_token=None, sd_profile=None):
         # Configurar logging
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
@@ -37,43 +144,36 @@ class ImageGenerator:
         
         # Configurar LangSmith
         try:
-            self.langsmith_client = Client(
-                api_key=os.getenv('LANGCHAIN_API_KEY'),
+            self.langsmith_client = client_pool.get(
+                'langsmith',
+                api_key=os.getenv('LANGCHAIN_API_KEY')
             )
         except Exception as e:
             self.logger.error(f"Error inicializando LangSmith: {e}")
             self.langsmith_client = None
 
-        # Inicializar clientes para servicios
+        # Cliente compartido del pool (OpenAI lee OPENAI_API_KEY del entorno). DALL-E
+        # no pasa por el limitador de tasa, así que conserva los reintentos del SDK
         try:
-            self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self.openai_client = client_pool.get('openai', max_retries=2)
         except Exception as e:
             self.logger.error(f"Error inicializando cliente OpenAI: {e}")
             self.openai_client = None
         
+        # Cliente HTTP compartido (pool de conexiones keep-alive)
+        self.http = get_http_client()
+        
         # Obtener API keys desde variables de entorno
         self.unsplash_access_key = os.getenv("UNSPLASH_ACCESS_KEY")
         self.pixabay_api_key = os.getenv("PIXABAY_API_KEY")
         
-        # Inicializar Stable Diffusion
-        try:
-            # Cargar modelo Stable Diffusion
-            self.sd_model = StableDiffusionPipeline.from_pretrained(
-                "runwayml/stable-diffusion-v1-5", 
-                torch_dtype=torch.float32,
-                safety_checker=None
-            )
-            
-            # Mover explícitamente a CPU
-            self.sd_model = self.sd_model.to("cpu")
-            
-            self.logger.info("Stable Diffusion model loaded successfully")
+        # Stable Diffusion se carga bajo demanda desde el registro compartido
+        self.sd_profile = sd_profile or STABLE_DIFFUSION_SETTINGS["profile"]
+        if self.sd_profile not in STABLE_DIFFUSION_PROFILES:
+            raise ValueError(f"Perfil de Stable Diffusion no válido: {self.sd_profile}")
         
-        except Exception as e:
-            self.logger.error(f"Error cargando modelo Stable Diffusion: {e}")
-            import traceback
-            traceback.print_exc()
-            self.sd_model = None
+        # Caché en disco compartida (None si está desactivada)
+        self.cache = get_image_cache()
 
     def _validate_and_adjust_size(self, width, height):
         """
@@ -91,7 +191,7 @@ class ImageGenerator:
         return adjusted_width, adjusted_height
 
     @traceable(name="get_unsplash_image")
-    def _get_unsplash_image(self, prompt, width, height):
+    def _get_unsplash_image(self, prompt, width, height, cancel=None):
         """
         Obtener imagen desde Unsplash
         """
@@ -110,7 +210,7 @@ class ImageGenerator:
             }
             
             # Realizar solicitud a API de Unsplash
-            response = requests.get(
+            response = self.http.get(
                 "https://api.unsplash.com/photos/random", 
                 params=params
             )
@@ -120,10 +220,11 @@ class ImageGenerator:
                 data = response.json()
                 image_url = data['urls']['custom']  # URL de imagen con dimensiones personalizadas
                 
-                # Descargar imagen
-                image_response = requests.get(image_url)
-                if image_response.status_code == 200:
-                    return image_response.content
+                # Descargar imagen (se abandona si otra fuente ya ha ganado)
+                if cancel is None or not cancel.is_set():
+                    image = self._download_image(image_url, cancel)
+                    if image:
+                        return image
             
             self.logger.error(f"Error obteniendo imagen de Unsplash: {response.status_code}")
             return None
@@ -133,7 +234,7 @@ class ImageGenerator:
             return None
 
     @traceable(name="get_pixabay_image")
-    def _get_pixabay_image(self, prompt, width, height):
+    def _get_pixabay_image(self, prompt, width, height, cancel=None):
         """
         Obtener imagen desde Pixabay
         """
@@ -154,7 +255,7 @@ class ImageGenerator:
             }
             
             # Realizar solicitud a API de Pixabay
-            response = requests.get(
+            response = self.http.get(
                 "https://pixabay.com/api/", 
                 params=params
             )
@@ -163,12 +264,19 @@ class ImageGenerator:
             if response.status_code == 200:
                 data = response.json()
                 if data.get('hits'):
-                    # Seleccionar primera imagen que cumpla con los requisitos
-                    for hit in data['hits']:
-                        # Descargar imagen de tamaño grande
-                        image_response = requests.get(hit['largeImageURL'])
-                        if image_response.status_code == 200:
-                            return image_response.content
+                    # Descargar los candidatos por lotes concurrentes y quedarse con el primero
+                    # válido; si falla un lote entero se sigue con los siguientes resultados
+                    batch_size = IMAGE_SOURCE_SETTINGS["pixabay_parallel_downloads"]
+                    hits = data['hits']
+                    for start in range(0, len(hits), batch_size):
+                        if cancel is not None and cancel.is_set():
+                            return None
+                        image = self._first_successful([
+                            functools.partial(self._download_image, hit['largeImageURL'])
+                            for hit in hits[start:start + batch_size]
+                        ], parent_cancel=cancel)
+                        if image:
+                            return image
             
             self.logger.error(f"Error obteniendo imagen de Pixabay: {response.status_code}")
             return None
@@ -177,8 +285,238 @@ class ImageGenerator:
             self.logger.error(f"Error en búsqueda de Pixabay: {e}")
             return None
 
+    @traceable(name="get_stock_image")
+    def _get_stock_image(self, prompt, width, height):
+        """
+        Consultar Unsplash y Pixabay en paralelo y devolver la primera imagen válida
+        """
+        image = self._first_successful([
+            functools.partial(self._get_unsplash_image, prompt, width, height),
+            functools.partial(self._get_pixabay_image, prompt, width, height)
+        ])
+        if image is None:
+            self.logger.error("Ningún banco de imágenes devolvió una imagen válida")
+        return image
+
+    def _download_image(self, url, cancel=None):
+        """
+        Descargar una imagen por fragmentos; None si la respuesta no es una
+        imagen válida o si se cancela la descarga (la conexión se cierra)
+        """
+        with self.http.get(url, stream=True) as response:
+            if response.status_code != 200 or \
+                    not response.headers.get('Content-Type', 'image/').startswith('image/'):
+                return None
+            chunks = []
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if cancel is not None and cancel.is_set():
+                    return None
+                chunks.append(chunk)
+        return b"".join(chunks) or None
+
+    def _first_successful(self, tasks, parent_cancel=None):
+        """
+        Ejecutar las tareas en paralelo y devolver el primer resultado válido.
+        Cada tarea recibe `cancel`; se activa en cuanto una gana (o al agotar
+        el tiempo) para que las demás abandonen sus descargas y liberen sus conexiones.
+        """
+        if not tasks:
+            return None
+        
+        cancel = _Cancellation(parent_cancel)
+        executor = ContextThreadPoolExecutor(max_workers=len(tasks))
+        deadline = time.monotonic() + IMAGE_SOURCE_SETTINGS["hedge_timeout"]
+        try:
+            pending = {executor.submit(task, cancel=cancel) for task in tasks}
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED
+                )
+                if not done:
+                    self.logger.warning("Tiempo de espera agotado buscando imágenes")
+                    return None
+                
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error en descarga concurrente: {e}")
+                        continue
+                    if result:
+                        return result
+            return None
+        finally:
+            # Las tareas en curso ven la señal y terminan por su cuenta; no se esperan
+            cancel.set()
+            executor.shutdown(wait=False)
+
+    def _run_stable_diffusion(self, prompt, width, height, num_images=1):
+        """
+        Ejecuta una única llamada al pipeline y devuelve las imágenes PIL generadas.
+        Varias imágenes con la misma forma latente comparten el codificador de texto
+        y se procesan en lote en la UNet.
+        """
+        profile = STABLE_DIFFUSION_PROFILES[self.sd_profile]
+        with model_registry.use(sd_model_key(self.sd_profile)) as sd_model:
+            return sd_model(
+                prompt=prompt, 
+                num_inference_steps=profile["num_inference_steps"],
+                guidance_scale=7.5,
+                width=width,
+                height=height,
+                num_images_per_prompt=num_images
+            ).images
+
+    def _fit_to_size(self, image, width, height):
+        """
+        Recorta centrado y redimensiona la imagen (PIL o bytes) para cubrir
+        exactamente width x height. Devuelve bytes PNG.
+        """
+        if isinstance(image, bytes):
+            image = Image.open(io.BytesIO(image)).convert("RGB")
+        
+        fitted = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        img_byte_arr = io.BytesIO()
+        fitted.save(img_byte_arr, format='PNG')
+        return img_byte_arr.getvalue()
+
+    def _dall_e_size(self, width, height):
+        """
+        Mapea tamaños personalizados a tamaños estándar de DALL-E
+        """
+        dall_e_sizes = ['256x256', '512x512', '1024x1024', '1024x1792', '1792x1024']
+        
+        # Si ya es un tamaño estándar, úsalo
+        if f"{width}x{height}" in dall_e_sizes:
+            return f"{width}x{height}"
+        
+        # Mapeo de tamaños específicos a los más cercanos de DALL-E
+        size_mapping = {
+            (1200, 632): '1792x1024',   # Blog/LinkedIn
+            (1080, 1080): '1024x1024',  # Instagram
+            (1200, 672): '1792x1024'    # Twitter
+        }
+        
+        # Si no hay mapeo directo, elegir el tamaño estándar más común
+        return size_mapping.get((width, height), '1024x1024')
+
+    def _generate_dall_e(self, prompt, width, height):
+        """
+        Generar imagen con DALL-E y devolver su URL
+        """
+        # Encontrar el tamaño más apropiado
+        size_str = self._dall_e_size(width, height)
+        
+        self.logger.info(f"Usando tamaño DALL-E: {size_str} (original solicitado: {width}x{height})")
+        
+        response = self.openai_client.images.generate(
+            model="dall-e-3",
+            prompt=prompt,
+            size=size_str
+        )
+        return response.data[0].url
+
+    def _search_unsplash_batch(self, prompt, width, height, count):
+        """
+        Una sola búsqueda en Unsplash que devuelve hasta `count` imágenes de al menos width x height
+        """
+        response = self.http.get(
+            "https://api.unsplash.com/photos/random", 
+            params={
+                'query': prompt,
+                'client_id': self.unsplash_access_key,
+                'count': count
+            }
+        )
+        if response.status_code != 200:
+            self.logger.error(f"Error obteniendo imagen de Unsplash: {response.status_code}")
+            return []
+        
+        images = []
+        for photo in response.json():
+            # URL con recorte al tamaño envolvente de todas las plataformas
+            image_url = f"{photo['urls']['raw']}&w={width}&h={height}&fit=crop"
+            image_response = self.http.get(image_url)
+            if image_response.status_code == 200:
+                images.append(image_response.content)
+        return images
+
+    def _search_pixabay_batch(self, prompt, width, height, count):
+        """
+        Una sola búsqueda en Pixabay que devuelve hasta `count` imágenes de al menos width x height
+        """
+        response = self.http.get(
+            "https://pixabay.com/api/", 
+            params={
+                'key': self.pixabay_api_key,
+                'q': prompt,
+                'image_type': 'photo',
+                'per_page': max(count, 3),  # La API exige un mínimo de 3 resultados
+                'min_width': width,
+                'min_height': height,
+                'order': 'popular'
+            }
+        )
+        if response.status_code != 200:
+            self.logger.error(f"Error obteniendo imagen de Pixabay: {response.status_code}")
+            return []
+        
+        images = []
+        for hit in response.json().get('hits', []):
+            if len(images) >= count:
+                break
+            image_response = self.http.get(hit['largeImageURL'])
+            if image_response.status_code == 200:
+                images.append(image_response.content)
+        return images
+
+    def _cache_key(self, prompt, width, height, generator):
+        """
+        Clave de caché: incluye los parámetros que cambian el resultado
+        """
+        params = {}
+        if generator == 'stable-diffusion':
+            profile = STABLE_DIFFUSION_PROFILES[self.sd_profile]
+            params = {
+                "model_id": STABLE_DIFFUSION_SETTINGS["model_id"],
+                "profile": self.sd_profile,
+                "num_inference_steps": profile["num_inference_steps"],
+                "guidance_scale": 7.5
+            }
+        return self.cache.make_key(generator, prompt, width, height, **params)
+
     @traceable(name="generate_image")
     def generate_image(self, prompt, platform, generator='unsplash'):
+        """
+        Generar u obtener una imagen, sirviendo desde la caché en disco si es posible
+        """
+        if self.cache is None:
+            return self._generate_image(prompt, platform, generator)
+        
+        width, height = self.PLATFORM_SIZES.get(platform, (1024, 1024))
+        key = self._cache_key(prompt, width, height, generator)
+        
+        try:
+            cached = self.cache.get(key)
+        except Exception as e:
+            # Una entrada corrupta o una caché inaccesible cuenta como fallo de caché
+            self.logger.error(f"Error leyendo imagen de caché: {e}")
+            cached = None
+        if cached is not None:
+            self.logger.info(f"Imagen servida desde caché ({generator}, {width}x{height})")
+            return cached
+        
+        image = self._generate_image(prompt, platform, generator)
+        if image:
+            try:
+                self.cache.put(key, generator, image)
+            except Exception as e:
+                self.logger.error(f"Error guardando imagen en caché: {e}")
+        return image
+
+    def _generate_image(self, prompt, platform, generator):
         try:
             # Obtener tamaño específico de plataforma, con fallback a un tamaño genérico
             size = self.PLATFORM_SIZES.get(platform, (1024, 1024))
@@ -191,33 +529,20 @@ class ImageGenerator:
             elif generator == 'pixabay':
                 return self._get_pixabay_image(prompt, width, height)
             
+            elif generator == 'stock':
+                return self._get_stock_image(prompt, width, height)
+            
             elif generator == 'stable-diffusion':
-                # Verificar si el modelo está inicializado
-                if self.sd_model is None:
-                    self.logger.error("Stable Diffusion model is not initialized")
-                    return None
-
                 try:
-                    # Generar imagen con Stable Diffusion
-                    images = self.sd_model(
-                        prompt=prompt, 
-                        num_inference_steps=20,
-                        guidance_scale=7.5,
-                        width=width,   # Usar ancho original
-                        height=height  # Usar alto original
-                    ).images
+                    # Generar imagen con el modelo compartido (se carga en el primer uso)
+                    images = self._run_stable_diffusion(prompt, width, height)
                     
                     if not images:
                         self.logger.error("No images were generated")
                         return None
                     
-                    # Redimensionar imagen al tamaño exacto 
-                    resized_image = images[0].resize((width, height), Image.LANCZOS)
-                    
-                    # Convertir a bytes
-                    img_byte_arr = io.BytesIO()
-                    resized_image.save(img_byte_arr, format='PNG')
-                    return img_byte_arr.getvalue()
+                    # Ajustar al tamaño exacto y convertir a bytes
+                    return self._fit_to_size(images[0], width, height)
                 
                 except Exception as sd_err:
                     self.logger.error(f"Detailed Stable Diffusion error: {sd_err}")
@@ -232,41 +557,7 @@ class ImageGenerator:
                     return None
 
                 try:
-                    # Mapear tamaños personalizados a tamaños estándar de DALL-E
-                    dall_e_sizes = ['256x256', '512x512', '1024x1024', '1024x1792', '1792x1024']
-                    
-                    # Función para encontrar el tamaño estándar más cercano
-                    def find_closest_size(width, height):
-                        # Si ya es un tamaño estándar, úsalo
-                        if f"{width}x{height}" in dall_e_sizes:
-                            return f"{width}x{height}"
-                        
-                        # Mapeo de tamaños específicos a los más cercanos de DALL-E
-                        size_mapping = {
-                            (1200, 632): '1792x1024',   # Blog/LinkedIn
-                            (1080, 1080): '1024x1024',  # Instagram
-                            (1200, 672): '1792x1024'    # Twitter
-                        }
-                        
-                        # Buscar mapeo directo primero
-                        if (width, height) in size_mapping:
-                            return size_mapping[(width, height)]
-                        
-                        # Si no hay mapeo directo, elegir el tamaño más cercano
-                        return '1024x1024'  # Fallback al tamaño estándar más común
-                    
-                    # Encontrar el tamaño más apropiado
-                    size_str = find_closest_size(width, height)
-                    
-                    self.logger.info(f"Usando tamaño DALL-E: {size_str} (original solicitado: {width}x{height})")
-                    
-                    # Generar imagen
-                    response = self.openai_client.images.generate(
-                        model="dall-e-3",
-                        prompt=prompt,
-                        size=size_str
-                    )
-                    return response.data[0].url
+                    return self._generate_dall_e(prompt, width, height)
                 except Exception as e:
                     self.logger.error(f"DALL-E image generation error: {e}")
                     return None
@@ -277,4 +568,90 @@ class ImageGenerator:
         
         except Exception as e:
             self.logger.error(f"Error generando imagen: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @traceable(name="generate_images")
+    def generate_images(self, prompt, platforms=None, generator='unsplash', num_variants=1, smart_crop=False):
+        """
+        Generar el mismo prompt para varias plataformas y variantes en lote.
+        
+        - Stable Diffusion: una llamada al pipeline por forma latente compartida
+          o, con smart_crop, una sola generación recortada a cada plataforma
+        - Unsplash/Pixabay: una búsqueda reutilizada en todas las plataformas
+        - DALL-E: una generación por tamaño estándar de DALL-E
+        
+        Devuelve {plataforma: [imagen, ...]} con hasta num_variants imágenes por plataforma.
+        """
+        platforms = platforms or list(self.PLATFORM_SIZES.keys())
+        sizes = {
+            platform: self.PLATFORM_SIZES.get(platform, (1024, 1024))
+            for platform in platforms
+        }
+        results = {platform: [] for platform in platforms}
+        
+        try:
+            if generator in ('unsplash', 'pixabay'):
+                # Buscar una vez al tamaño envolvente y recortar para cada plataforma
+                max_width = max(width for width, _ in sizes.values())
+                max_height = max(height for _, height in sizes.values())
+                
+                if generator == 'unsplash':
+                    if not self.unsplash_access_key:
+                        self.logger.error("Unsplash access key no configurada")
+                        return results
+                    found = self._search_unsplash_batch(prompt, max_width, max_height, num_variants)
+                else:
+                    if not self.pixabay_api_key:
+                        self.logger.error("Pixabay API key no configurada")
+                        return results
+                    found = self._search_pixabay_batch(prompt, max_width, max_height, num_variants)
+                
+                for platform, (width, height) in sizes.items():
+                    results[platform] = [self._fit_to_size(image, width, height) for image in found]
+            
+            elif generator == 'stable-diffusion':
+                if smart_crop:
+                    # Generar una vez en el lienzo envolvente (múltiplo de 8 para la UNet)
+                    # y recortar a cada plataforma sin tener que ampliar
+                    width = -(-max(width for width, _ in sizes.values()) // 8) * 8
+                    height = -(-max(height for _, height in sizes.values()) // 8) * 8
+                    images = self._run_stable_diffusion(prompt, width, height, num_variants)
+                    for platform, (width, height) in sizes.items():
+                        results[platform] = [self._fit_to_size(image, width, height) for image in images]
+                else:
+                    # Agrupar plataformas que comparten forma latente (p. ej. blog y linkedin)
+                    by_shape = {}
+                    for platform, size in sizes.items():
+                        by_shape.setdefault(size, []).append(platform)
+                    
+                    for (width, height), shape_platforms in by_shape.items():
+                        images = self._run_stable_diffusion(prompt, width, height, num_variants)
+                        encoded = [self._fit_to_size(image, width, height) for image in images]
+                        for platform in shape_platforms:
+                            results[platform] = encoded
+            
+            elif generator == 'dall-e':
+                if self.openai_client is None:
+                    self.logger.error("OpenAI client is not initialized")
+                    return results
+                
+                # Las plataformas que comparten tamaño DALL-E reutilizan las mismas imágenes
+                by_dall_e_size = {}
+                for platform, (width, height) in sizes.items():
+                    by_dall_e_size.setdefault(self._dall_e_size(width, height), []).append(platform)
+                
+                for size_platforms in by_dall_e_size.values():
+                    width, height = sizes[size_platforms[0]]
+                    # dall-e-3 solo admite una imagen por petición
+                    urls = [self._generate_dall_e(prompt, width, height) for _ in range(num_variants)]
+                    for platform in size_platforms:
+                        results[platform] = urls
+            
+            else:
+                self.logger.error(f"Invalid image generator: {generator}")
+                raise ValueError("Generador de imágenes no válido")
+        
+        except Exception as e:
+            self.logger.error(f"Error generando imágenes en lote: {e}")
+        
+        return results
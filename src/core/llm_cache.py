@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+from config.settings import CACHE_DIR, LLM_CACHE_SETTINGS
+
+
+class MemoryCacheBackend:
+    """
+    Nivel en memoria con expulsión LRU
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Nivel persistente en SQLite con TTL
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path, ttl=7 * 24 * 3600):
+        self.db_path = db_path
+        self.ttl = ttl
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+        return row[0]
+
+    def set(self, key, value):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+
+    def __len__(self):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class LLMCache:
+    """
+    Caché de respuestas del LLM por coincidencia exacta.
+
+    Características:
+    - Clave derivada de (proveedor, modelo, mensajes, parámetros de muestreo)
+    - Niveles intercambiables consultados en orden (por defecto memoria y SQLite);
+      un acierto en un nivel inferior se promociona a los superiores
+    - Contadores de aciertos por nivel y de fallos
+    """
+
+    def __init__(self, backends):
+        self.logger = logging.getLogger(__name__)
+        self.backends = list(backends)
+
+        self.hits = {backend.name: 0 for backend in self.backends}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider, model, messages, **params):
+        payload = json.dumps(
+            {"provider": provider, "model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        for level, backend in enumerate(self.backends):
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                self.logger.warning(f"Error leyendo la caché LLM ({backend.name}): {e}")
+                continue
+            if value is None:
+                continue
+
+            for upper in self.backends[:level]:
+                upper.set(key, value)
+            with self._lock:
+                self.hits[backend.name] += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        for backend in self.backends:
+            try:
+                backend.set(key, value)
+            except Exception as e:
+                self.logger.warning(f"Error escribiendo la caché LLM ({backend.name}): {e}")
+
+    def stats(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "hits_by_backend": dict(self.hits),
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0
+            }
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Caché de respuestas compartida por el proceso (None si está desactivada)
+    """
+    global _llm_cache
+    if not LLM_CACHE_SETTINGS["enabled"]:
+        return None
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache([
+                MemoryCacheBackend(LLM_CACHE_SETTINGS["memory_entries"]),
+                SQLiteCacheBackend(
+                    os.path.join(CACHE_DIR, "llm_responses.sqlite3"),
+                    ttl=LLM_CACHE_SETTINGS["ttl"]
+                )
+            ])
+    return _llm_cache
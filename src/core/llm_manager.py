@@ -1,22 +1,89 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from models.content import Content
 import uuid
 from langsmith import traceable
+from core.llm_cache import get_llm_cache
+from core.client_pool import client_pool
+from core.rate_limiter import get_rate_limiter
+from core.provider_router import provider_router
+from config.settings import LLM_BATCH_SETTINGS
+
+# Hilos para las peticiones duplicadas (hedging) del proveedor "auto"
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def _close_discarded(future):
+    """
+    Cierra el stream de la petición que perdió la carrera del hedging
+    """
+    if not future.cancelled() and future.exception() is None and hasattr(future.result(), "close"):
+        future.result().close()
+
+
+class TokenStream:
+    """
+    Iterable de fragmentos de texto a medida que llegan del proveedor.
+    Al agotarse guarda el texto completo y construye el resultado final
+    con `on_complete` (p. ej. un objeto Content).
+    """
+
+    def __init__(self, chunks, on_complete=None):
+        self.logger = logging.getLogger(__name__)
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self.text = None
+        self.result = None
+        self.time_to_first_token = None
+
+    def __iter__(self):
+        start = time.perf_counter()
+        parts = []
+        for chunk in self._chunks:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - start
+                self.logger.info(f"Primer token en {self.time_to_first_token:.2f}s")
+            parts.append(chunk)
+            yield chunk
+
+        self.text = "".join(parts).strip()
+        self.result = self._on_complete(self.text) if self._on_complete else self.text
+
 
 class LLMManager:
-    def __init__(self, provider='openai'):
+    def __init__(self, provider='openai', cache=None):
         self.provider = provider
+        # Caché de respuestas: None usa la configuración global, False la desactiva
+        self.cache = get_llm_cache() if cache is None else (cache or None)
+        # Clientes asíncronos por event loop (el manager se comparte entre hilos)
+        self._async_clients = {}
+        self._async_lock = threading.Lock()
         
-        # Importaciones condicionales para evitar errores
+        # Clientes compartidos del pool (importaciones condicionales para evitar errores)
         try:
             if provider == 'openai':
-                from openai import OpenAI
-                self.client = OpenAI()  # Sin parámetros
+                self.client = client_pool.get('openai')  # Sin parámetros
                 self.model = "gpt-4o-mini"
             elif provider == 'groq':
-                from groq import Groq
-                self.client = Groq()  # Sin parámetros
+                self.client = client_pool.get('groq')  # Sin parámetros
                 self.model = "llama3-8b-8192"
+            elif provider == 'auto':
+                # Cada llamada va al proveedor más rápido y sano (ver ProviderRouter)
+                self.client = None
+                self.model = "auto"
+                self._routes = {}
+                for name in provider_router.providers:
+                    try:
+                        self._routes[name] = LLMManager(provider=name, cache=False)
+                    except Exception as e:
+                        print(f"Proveedor {name} no disponible para 'auto': {e}")
+                if not self._routes:
+                    raise ValueError("Ningún proveedor disponible para 'auto'")
             else:
                 raise ValueError(f"Proveedor no soportado: {provider}")
         
@@ -26,6 +93,186 @@ class LLMManager:
         except Exception as e:
             print(f"Error de inicialización: {e}")
             raise
+        
+        # Limitador de tasa compartido por proveedor/modelo (None sin límites configurados)
+        self.rate_limiter = get_rate_limiter(self.provider, self.model)
+
+    def _content_messages(self, prompt, language):
+        return [
+            {
+                "role": "system", 
+                "content": f"You are an expert content generation assistant. Respond in {language}."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+
+    def _cache_key(self, messages, params):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.provider, self.model, messages, **params)
+
+    def _create(self, messages, **params):
+        """
+        Llamada al proveedor a través del limitador de tasa (cola y reintentos ante 429)
+        """
+        if self.provider == 'auto':
+            return self._routed_create(messages, params)
+        
+        def create():
+            return self.client.chat.completions.create(model=self.model, messages=messages, **params)
+        
+        if self.rate_limiter is None:
+            return create()
+        return self.rate_limiter.call(
+            create, self.rate_limiter.estimate_tokens(messages, params.get("max_tokens"))
+        )
+
+    async def _acreate(self, messages, **params):
+        if self.provider == 'auto':
+            return await self._arouted_create(messages, params)
+        
+        def create():
+            return self._get_async_client().chat.completions.create(model=self.model, messages=messages, **params)
+        
+        if self.rate_limiter is None:
+            return await create()
+        return await self.rate_limiter.acall(
+            create, self.rate_limiter.estimate_tokens(messages, params.get("max_tokens"))
+        )
+
+    def _timed_create(self, name, messages, params):
+        start = time.perf_counter()
+        try:
+            response = self._routes[name]._create(messages, **params)
+        except Exception:
+            provider_router.record(name, time.perf_counter() - start, ok=False)
+            raise
+        provider_router.record(name, time.perf_counter() - start)
+        return response
+
+    def _routed_create(self, messages, params):
+        """
+        Proveedor "auto": el mejor proveedor según el router y, si falla, el
+        siguiente. Con hedging, si el primero tarda más del umbral se lanza la
+        misma petición al segundo y se usa la primera respuesta correcta.
+        """
+        ranked = provider_router.rank(self._routes)
+        delay = provider_router.hedge_delay(ranked[0]) if len(ranked) > 1 else None
+        
+        if delay is None:
+            for name in ranked[:-1]:
+                try:
+                    return self._timed_create(name, messages, params)
+                except Exception as e:
+                    print(f"Proveedor {name} falló, probando el siguiente: {e}")
+            return self._timed_create(ranked[-1], messages, params)
+        
+        primary = _hedge_executor.submit(self._timed_create, ranked[0], messages, params)
+        done, _ = wait([primary], timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+        
+        # Sin respuesta a tiempo (o con error): petición duplicada al segundo proveedor
+        secondary = _hedge_executor.submit(self._timed_create, ranked[1], messages, params)
+        pending = {secondary} | ({primary} - done)
+        error = primary.exception() if done else None
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(_close_discarded)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _atimed_create(self, name, messages, params):
+        start = time.perf_counter()
+        try:
+            response = await self._routes[name]._acreate(messages, **params)
+        except Exception:
+            provider_router.record(name, time.perf_counter() - start, ok=False)
+            raise
+        provider_router.record(name, time.perf_counter() - start)
+        return response
+
+    async def _arouted_create(self, messages, params):
+        """
+        Versión asíncrona de _routed_create; la petición perdedora se cancela
+        """
+        ranked = provider_router.rank(self._routes)
+        delay = provider_router.hedge_delay(ranked[0]) if len(ranked) > 1 else None
+        
+        if delay is None:
+            for name in ranked[:-1]:
+                try:
+                    return await self._atimed_create(name, messages, params)
+                except Exception as e:
+                    print(f"Proveedor {name} falló, probando el siguiente: {e}")
+            return await self._atimed_create(ranked[-1], messages, params)
+        
+        primary = asyncio.ensure_future(self._atimed_create(ranked[0], messages, params))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+        
+        secondary = asyncio.ensure_future(self._atimed_create(ranked[1], messages, params))
+        pending = {secondary} | ({primary} - done)
+        error = primary.exception() if done else None
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    def chat(self, messages, **params):
+        """
+        Completion de chat; devuelve el texto de la respuesta.
+        OpenAI y Groq comparten la misma interfaz de cliente.
+        """
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = self._create(messages, **params)
+        text = response.choices[0].message.content
+        if cache_key is not None and text is not None:
+            self.cache.set(cache_key, text)
+        return text
+
+    @traceable(name="stream_chat", run_type="llm")
+    def stream_chat(self, messages, **params):
+        """
+        Completion de chat en streaming; produce los fragmentos de texto según llegan.
+        Una respuesta en caché se entrega como un único fragmento.
+        """
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        stream = self._create(messages, stream=True, **params)
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        
+        # Solo se guarda la respuesta si el stream se consumió por completo
+        if cache_key is not None and parts:
+            self.cache.set(cache_key, "".join(parts))
+
     @traceable(name="generate_content")
     def generate_content(self, prompt, platform, topic, audience, language="castellano"):
         try:
@@ -44,21 +291,116 @@ class LLMManager:
                 )
            
             # Generación de contenido
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": f"You are an expert content generation assistant. Respond in {language}."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ]
+            generated_text = self.chat(self._content_messages(prompt, language)).strip()
+            
+            return Content(
+                id=str(uuid.uuid4()),
+                platform=platform,
+                topic=topic,
+                audience=audience,
+                language=language,
+                text=generated_text
             )
             
-            generated_text = response.choices[0].message.content.strip()
+        except Exception as e:
+            error_details = f"Error en generación de contenido: {str(e)}\n{traceback.format_exc()}"
+            print(error_details)
+            raise RuntimeError(error_details)
+
+    def stream_content(self, prompt, platform, topic, audience, language="castellano"):
+        """
+        Versión en streaming de generate_content. Devuelve un TokenStream
+        cuyo `result` es el objeto Content una vez consumido el stream.
+        """
+        if not prompt:
+            raise ValueError("El prompt no puede estar vacío")
+        
+        def build_content(text):
+            return Content(
+                id=str(uuid.uuid4()),
+                platform=platform,
+                topic=topic,
+                audience=audience,
+                language=language,
+                text=text
+            )
+        
+        return TokenStream(
+            self._stream_content_chunks(self._content_messages(prompt, language)),
+            on_complete=build_content
+        )
+
+    @traceable(name="stream_content")
+    def _stream_content_chunks(self, messages):
+        """
+        Fragmentos de stream_content, con la misma traza y el mismo
+        tratamiento de errores que generate_content
+        """
+        try:
+            yield from self.stream_chat(messages)
+        except Exception as e:
+            error_details = f"Error en generación de contenido: {str(e)}\n{traceback.format_exc()}"
+            print(error_details)
+            raise RuntimeError(error_details)
+
+    def _get_async_client(self):
+        """
+        Cliente asíncrono del proveedor. Sus conexiones quedan ligadas al
+        event loop en el que se usan, así que se crea uno por loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = client_pool.create(f"{self.provider}-async")
+                self._async_clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """
+        Cierra los clientes asíncronos (y sus conexiones) del event loop actual
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.pop(loop, None)
+        if client is not None:
+            await client.close()
+        for route in getattr(self, '_routes', {}).values():
+            await route.aclose()
+
+    async def _run_and_close(self, coroutine):
+        # Para loops creados solo para un lote: los clientes se cierran al terminar
+        try:
+            return await coroutine
+        finally:
+            await self.aclose()
+
+    async def achat(self, messages, **params):
+        """
+        Versión asíncrona de chat, con la misma caché de respuestas
+        """
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        response = await self._acreate(messages, **params)
+        text = response.choices[0].message.content
+        if cache_key is not None and text is not None:
+            self.cache.set(cache_key, text)
+        return text
+
+    @traceable(name="agenerate_content")
+    async def agenerate_content(self, prompt, platform, topic, audience, language="castellano"):
+        """
+        Versión asíncrona de generate_content
+        """
+        try:
+            if not prompt:
+                raise ValueError("El prompt no puede estar vacío")
+            
+            generated_text = (await self.achat(self._content_messages(prompt, language))).strip()
             
             return Content(
                 id=str(uuid.uuid4()),
@@ -72,4 +414,69 @@ class LLMManager:
         except Exception as e:
             error_details = f"Error en generación de contenido: {str(e)}\n{traceback.format_exc()}"
             print(error_details)
-            raise RuntimeError(error_details)
\ No newline at end of file
+            raise RuntimeError(error_details)
+
+    async def _agenerate_each(self, jobs, max_concurrency, on_result):
+        """
+        Ejecuta los trabajos con como mucho `max_concurrency` llamadas en curso.
+        Llama a on_result(índice, Content o excepción) según va terminando cada uno.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or LLM_BATCH_SETTINGS["max_concurrency"])
+        
+        async def run(index, job):
+            async with semaphore:
+                try:
+                    result = await self.agenerate_content(*job)
+                except Exception as e:
+                    # Un fallo se devuelve en su posición y no interrumpe el lote
+                    result = e
+            on_result(index, result)
+        
+        await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs)))
+
+    async def agenerate_many(self, jobs, max_concurrency=None):
+        """
+        Genera un lote de trabajos (prompt, platform, topic, audience, language).
+        Devuelve, en el orden de entrada, un Content o la excepción de cada trabajo.
+        """
+        jobs = list(jobs)
+        results = [None] * len(jobs)
+        
+        def store(index, result):
+            results[index] = result
+        
+        await self._agenerate_each(jobs, max_concurrency, store)
+        return results
+
+    def generate_many(self, jobs, max_concurrency=None):
+        """
+        Versión síncrona de agenerate_many para código sin event loop
+        """
+        return asyncio.run(self._run_and_close(self.agenerate_many(jobs, max_concurrency)))
+
+    def iter_generate_many(self, jobs, max_concurrency=None):
+        """
+        Como generate_many, pero produce (índice, Content o excepción) a medida
+        que termina cada trabajo. El event loop corre en un hilo propio, de modo
+        que el llamante (p. ej. Streamlit) puede mostrar resultados progresivamente.
+        """
+        jobs = list(jobs)
+        results = queue.Queue()
+        done = object()
+        
+        def run_loop():
+            try:
+                asyncio.run(self._run_and_close(
+                    self._agenerate_each(jobs, max_concurrency, lambda i, r: results.put((i, r)))
+                ))
+            except Exception as e:
+                print(f"Error en la generación por lotes: {e}")
+            finally:
+                results.put(done)
+        
+        threading.Thread(target=run_loop, daemon=True).start()
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            yield item
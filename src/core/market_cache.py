@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+from config.settings import MARKET_CACHE_SETTINGS
+
+# Horario de negociación de cada bolsa (hora local, sin festivos)
+EXCHANGE_HOURS = {
+    "NYSE": ("America/New_York", [(dtime(9, 30), dtime(16, 0))]),
+    "NASDAQ": ("America/New_York", [(dtime(9, 30), dtime(16, 0))]),
+    "LSE": ("Europe/London", [(dtime(8, 0), dtime(16, 30))]),
+    "TSE": ("Asia/Tokyo", [(dtime(9, 0), dtime(11, 30)), (dtime(12, 30), dtime(15, 30))])
+}
+
+
+def is_market_open(exchange, now=None):
+    tz_name, sessions = EXCHANGE_HOURS[exchange]
+    local_now = (now or datetime.now(ZoneInfo("UTC"))).astimezone(ZoneInfo(tz_name))
+    if local_now.weekday() >= 5:
+        return False
+    return any(start <= local_now.time() < end for start, end in sessions)
+
+
+def next_market_open(exchange, now=None):
+    """
+    Próxima apertura (incluida la reapertura tras la pausa del mediodía)
+    """
+    tz_name, sessions = EXCHANGE_HOURS[exchange]
+    tz = ZoneInfo(tz_name)
+    local_now = (now or datetime.now(ZoneInfo("UTC"))).astimezone(tz)
+
+    for day_offset in range(8):
+        day = local_now.date() + timedelta(days=day_offset)
+        if day.weekday() >= 5:
+            continue
+        for start, _ in sessions:
+            candidate = datetime.combine(day, start, tzinfo=tz)
+            if candidate > local_now:
+                return candidate
+    return None
+
+
+def market_ttl(exchange, now=None):
+    """
+    Segundos de validez de un dato: refresco frecuente con la bolsa abierta
+    y hasta la siguiente apertura con la bolsa cerrada
+    """
+    now = now or datetime.now(ZoneInfo("UTC"))
+    if exchange not in EXCHANGE_HOURS or is_market_open(exchange, now):
+        return MARKET_CACHE_SETTINGS["open_ttl"]
+
+    reopen = next_market_open(exchange, now)
+    if reopen is None:
+        return MARKET_CACHE_SETTINGS["open_ttl"]
+    return max((reopen - now).total_seconds(), MARKET_CACHE_SETTINGS["open_ttl"])
+
+
+class _CacheEntry:
+    def __init__(self, value, fresh_until, stale_until):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class StaleWhileRevalidateCache:
+    """
+    Caché en memoria compartida por todas las sesiones.
+
+    Características:
+    - TTL por entrada (fijo o calculado en cada escritura)
+    - Stale-while-revalidate: un dato caducado se sirve al instante
+      mientras se refresca en segundo plano
+    - Una sola petición en vuelo por clave
+    - Límite de entradas con expulsión LRU
+    """
+
+    def __init__(self, stale_ttl=24 * 3600, max_entries=256):
+        self.logger = logging.getLogger(__name__)
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+
+    def get_or_fetch(self, key, fetch, ttl):
+        """
+        Devuelve el valor de `key`, llamando a `fetch` si no hay dato utilizable.
+        `ttl` son segundos o una función sin argumentos que los calcula.
+        Los resultados vacíos no se guardan.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and now < entry.fresh_until:
+            return entry.value
+
+        if entry is not None and now < entry.stale_until:
+            self._refresh_in_background(key, fetch, ttl)
+            return entry.value
+
+        return self._fetch_and_store(key, fetch, ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _fetch_and_store(self, key, fetch, ttl):
+        with self._key_lock(key):
+            # Otra sesión pudo rellenar la entrada mientras se esperaba
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry.fresh_until:
+                return entry.value
+
+            value = fetch()
+            if value:
+                self._store(key, value, ttl)
+            return value
+
+    def _store(self, key, value, ttl):
+        seconds = ttl() if callable(ttl) else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = _CacheEntry(value, now + seconds, now + seconds + self.stale_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(old_key, None)
+
+    def _refresh_in_background(self, key, fetch, ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = fetch()
+                if value:
+                    self._store(key, value, ttl)
+            except Exception as e:
+                self.logger.error(f"Error refrescando {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="cache-refresh", daemon=True).start()
+
+
+# Instancia compartida por todas las sesiones del proceso
+market_data_cache = StaleWhileRevalidateCache(
+    stale_ttl=MARKET_CACHE_SETTINGS["stale_ttl"],
+    max_entries=MARKET_CACHE_SETTINGS["max_entries"]
+)
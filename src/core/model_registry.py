@@ -0,0 +1,181 @@
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import MODEL_REGISTRY_SETTINGS
+
+try:
+    import psutil
+except ImportError:  # Sin psutil no se vigila la presión de memoria
+    psutil = None
+
+
+class _RegistryEntry:
+    def __init__(self, loader, warmup=None):
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.last_used = 0.0
+        self.in_use = 0
+        self.load_lock = threading.Lock()
+        # Serializa la inferencia: los pipelines (p. ej. los schedulers de diffusers)
+        # guardan estado por llamada y no admiten usos simultáneos
+        self.use_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Registro de modelos compartido por todo el proceso.
+
+    Características:
+    - Carga perezosa: el modelo se construye en su primer uso
+    - Una única copia de los pesos reutilizada entre sesiones
+    - Warm-up opcional justo después de cargar
+    - Liberación tras un tiempo de inactividad o bajo presión de memoria
+    """
+
+    def __init__(self, idle_timeout=900, min_available_memory_mb=2048, check_interval=60):
+        self.logger = logging.getLogger(__name__)
+        self.idle_timeout = idle_timeout
+        self.min_available_memory_mb = min_available_memory_mb
+        self.check_interval = check_interval
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._monitor = None
+
+    def register(self, name, loader, warmup=None):
+        """
+        Registra un modelo sin cargarlo. `loader` construye el modelo y
+        `warmup`, si se indica, recibe el modelo recién cargado.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _RegistryEntry(loader, warmup)
+
+    def is_loaded(self, name):
+        entry = self._entries.get(name)
+        return entry is not None and entry.model is not None
+
+    def get(self, name):
+        """
+        Devuelve el modelo, cargándolo si todavía no está en memoria
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Modelo no registrado: {name}")
+
+        # Un solo hilo carga el modelo; el resto espera y reutiliza la misma copia
+        with entry.load_lock:
+            if entry.model is None:
+                start = time.perf_counter()
+                model = entry.loader()
+                self.logger.info(f"Modelo '{name}' cargado en {time.perf_counter() - start:.1f}s")
+
+                if entry.warmup is not None:
+                    try:
+                        entry.warmup(model)
+                    except Exception as e:
+                        self.logger.warning(f"Warm-up de '{name}' fallido: {e}")
+
+                entry.model = model
+            entry.last_used = time.monotonic()
+            model = entry.model
+
+        self._ensure_monitor()
+        return model
+
+    @contextmanager
+    def use(self, name):
+        """
+        Presta el modelo en exclusiva mientras dura el bloque `with`: las
+        llamadas concurrentes esperan su turno y un modelo en uso nunca se libera.
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Modelo no registrado: {name}")
+
+        with self._lock:
+            entry.in_use += 1
+        try:
+            with entry.use_lock:
+                yield self.get(name)
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def evict(self, name):
+        """
+        Libera el modelo si está cargado y nadie lo está usando
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            return False
+
+        with self._lock:
+            if entry.model is None or entry.in_use > 0:
+                return False
+            entry.model = None
+
+        gc.collect()
+        self.logger.info(f"Modelo '{name}' liberado de memoria")
+        return True
+
+    def evict_idle(self):
+        """
+        Libera los modelos que superan el tiempo máximo de inactividad
+        """
+        now = time.monotonic()
+        expired = [
+            name for name, entry in list(self._entries.items())
+            if entry.model is not None and now - entry.last_used > self.idle_timeout
+        ]
+        return [name for name in expired if self.evict(name)]
+
+    def evict_under_pressure(self):
+        """
+        Libera modelos, empezando por el menos usado recientemente, mientras
+        la memoria disponible esté por debajo del umbral configurado
+        """
+        if psutil is None:
+            return []
+
+        evicted = []
+        loaded = sorted(
+            (entry.last_used, name) for name, entry in list(self._entries.items())
+            if entry.model is not None
+        )
+        for _, name in loaded:
+            available_mb = psutil.virtual_memory().available / (1024 * 1024)
+            if available_mb >= self.min_available_memory_mb:
+                break
+            if self.evict(name):
+                evicted.append(name)
+        return evicted
+
+    def _ensure_monitor(self):
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._monitor = threading.Thread(
+                target=self._monitor_loop,
+                name="model-registry-monitor",
+                daemon=True
+            )
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while any(entry.model is not None for entry in list(self._entries.values())):
+            time.sleep(self.check_interval)
+            try:
+                self.evict_idle()
+                self.evict_under_pressure()
+            except Exception as e:
+                self.logger.error(f"Error en la vigilancia de modelos: {e}")
+
+
+# Instancia única compartida por todas las sesiones del proceso
+model_registry = ModelRegistry(**MODEL_REGISTRY_SETTINGS)
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config.settings import PROVIDER_ROUTER_SETTINGS
+
+
+class ProviderRouter:
+    """
+    Elige el proveedor de LLM para cada llamada del proveedor "auto".
+
+    Características:
+    - Latencia p50/p95 y tasa de error sobre una ventana de llamadas recientes
+    - Orden por p50 entre los proveedores sanos; los que tienen pocas
+      muestras se prueban primero
+    - Un proveedor con muchos errores se aparta durante un tiempo y después
+      vuelve a probarse
+    - Umbral para lanzar una petición duplicada (hedging) al segundo proveedor
+    """
+
+    def __init__(self, providers, window=50, min_samples=5, max_error_rate=0.5, max_consecutive_errors=3,
+                 cooldown=30, hedge=False, hedge_after=None, min_hedge_after=1.0):
+        self.logger = logging.getLogger(__name__)
+        self.providers = list(providers)
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_consecutive_errors = max_consecutive_errors
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.min_hedge_after = min_hedge_after
+
+        self._latencies = {provider: deque(maxlen=window) for provider in self.providers}
+        self._outcomes = {provider: deque(maxlen=window) for provider in self.providers}
+        self._last_error = {provider: 0.0 for provider in self.providers}
+        self._consecutive_errors = {provider: 0 for provider in self.providers}
+        self._lock = threading.Lock()
+
+    def record(self, provider, latency, ok=True):
+        with self._lock:
+            self._outcomes[provider].append(ok)
+            if ok:
+                self._latencies[provider].append(latency)
+                self._consecutive_errors[provider] = 0
+            else:
+                self._last_error[provider] = time.monotonic()
+                self._consecutive_errors[provider] += 1
+
+    def _stats(self, provider):
+        latencies = self._latencies[provider]
+        outcomes = self._outcomes[provider]
+        return {
+            "p50": float(np.percentile(latencies, 50)) if latencies else None,
+            "p95": float(np.percentile(latencies, 95)) if latencies else None,
+            "error_rate": 1 - sum(outcomes) / len(outcomes) if outcomes else 0.0,
+            "samples": len(outcomes)
+        }
+
+    def _healthy(self, provider, stats):
+        if (stats["error_rate"] <= self.max_error_rate
+                and self._consecutive_errors[provider] < self.max_consecutive_errors):
+            return True
+        return time.monotonic() - self._last_error[provider] > self.cooldown
+
+    def rank(self, available=None):
+        """
+        Proveedores en orden de preferencia para la próxima llamada
+        """
+        candidates = [p for p in self.providers if available is None or p in available]
+        with self._lock:
+            stats = {provider: self._stats(provider) for provider in candidates}
+
+        def preference(provider):
+            s = stats[provider]
+            return (
+                not self._healthy(provider, s),
+                s["samples"] >= self.min_samples,
+                s["p50"] if s["p50"] is not None else 0.0,
+                s["error_rate"]
+            )
+
+        return sorted(candidates, key=preference)
+
+    def hedge_delay(self, provider):
+        """
+        Segundos a esperar antes de duplicar la petición, o None sin hedging
+        """
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._lock:
+            p95 = self._stats(provider)["p95"]
+        return max(self.min_hedge_after, p95) if p95 is not None else None
+
+    def metrics(self):
+        with self._lock:
+            return {provider: self._stats(provider) for provider in self.providers}
+
+
+provider_router = ProviderRouter(**PROVIDER_ROUTER_SETTINGS)
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+
+from config.settings import RATE_LIMIT_SETTINGS
+
+
+def is_rate_limit_error(error):
+    """
+    Errores 429 de OpenAI y Groq (ambos SDK exponen status_code)
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+def is_retryable_error(error):
+    """
+    429, errores 5xx y fallos de conexión o timeout. Los clientes del pool se
+    crean sin reintentos propios, así que el limitador cubre también los
+    errores transitorios que antes reintentaba el SDK.
+    """
+    if is_rate_limit_error(error):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error):
+    """
+    Espera indicada por el proveedor en las cabeceras de un 429, o None
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class TokenBucket:
+    """
+    Cubo de tokens que se rellena de forma continua hasta `capacity` por minuto
+    """
+
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount, now):
+        """
+        Segundos hasta disponer de `amount` (una petición mayor que la
+        capacidad espera a tener el cubo lleno)
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount):
+        # Puede quedar en negativo: el exceso se descuenta de las siguientes peticiones
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Limitador compartido para un proveedor/modelo.
+
+    Características:
+    - Cubos de tokens para peticiones por minuto (RPM) y tokens por minuto (TPM)
+    - Cola FIFO: las peticiones se atienden en orden de llegada
+    - Reintentos ante 429 (y errores transitorios) con backoff exponencial y
+      jitter, respetando Retry-After
+    - Métricas de profundidad de cola y tiempo de espera
+    """
+
+    def __init__(self, rpm, tpm, max_retries=5, base_delay=1.0, max_delay=60.0, default_completion_tokens=1000):
+        self.logger = logging.getLogger(__name__)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_completion_tokens = default_completion_tokens
+
+        self._condition = threading.Condition()
+        self._queue = deque()
+
+        self.calls = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queue_depth = 0
+
+    def estimate_tokens(self, messages, max_tokens=None):
+        """
+        Estimación barata (~4 caracteres por token) del coste de una llamada
+        """
+        prompt_chars = len(json.dumps(messages, ensure_ascii=False))
+        return math.ceil(prompt_chars / 4) + (max_tokens or self.default_completion_tokens)
+
+    def acquire(self, tokens):
+        """
+        Bloquea hasta que sea el turno de la petición y haya capacidad en ambos cubos
+        """
+        ticket = object()
+        start = time.monotonic()
+        with self._condition:
+            self._queue.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    if self._queue[0] is ticket:
+                        now = time.monotonic()
+                        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                        if wait == 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(tokens)
+                            break
+                        self._condition.wait(timeout=wait)
+                    else:
+                        self._condition.wait()
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+            waited = time.monotonic() - start
+            self.calls += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        if waited > 1:
+            self.logger.info(f"Petición en espera {waited:.1f}s por límite de tasa")
+
+    async def acquire_async(self, tokens):
+        # La cola es común a hilos y corrutinas; la espera se hace fuera del event loop
+        await asyncio.to_thread(self.acquire, tokens)
+
+    def _backoff(self, error, attempt):
+        if is_rate_limit_error(error):
+            self.throttled += 1
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return retry_after
+        # Jitter completo: evita que todas las sesiones reintenten a la vez
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, tokens):
+        """
+        Ejecuta fn() cuando hay capacidad, reintentando ante 429 y errores transitorios
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                self.logger.warning(
+                    f"Error transitorio del proveedor ({type(e).__name__}), reintento {attempt + 1} en {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    async def acall(self, fn, tokens):
+        """
+        Versión asíncrona de call; fn devuelve una corrutina
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(tokens)
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(e, attempt)
+                self.logger.warning(
+                    f"Error transitorio del proveedor ({type(e).__name__}), reintento {attempt + 1} en {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "avg_wait": self.total_wait / self.calls if self.calls else 0.0,
+                "max_wait": self.max_wait
+            }
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider, model):
+    """
+    Limitador compartido por el proceso para el proveedor/modelo (None si no hay límites configurados)
+    """
+    limits = RATE_LIMIT_SETTINGS["limits"].get(provider, {}).get(model)
+    if limits is None:
+        return None
+
+    with _rate_limiters_lock:
+        key = (provider, model)
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(
+                limits["rpm"],
+                limits["tpm"],
+                max_retries=RATE_LIMIT_SETTINGS["max_retries"],
+                base_delay=RATE_LIMIT_SETTINGS["base_delay"],
+                max_delay=RATE_LIMIT_SETTINGS["max_delay"],
+                default_completion_tokens=RATE_LIMIT_SETTINGS["default_completion_tokens"]
+            )
+    return _rate_limiters[key]
@@ -3,17 +3,41 @@ import logging
 import os
 import arxiv  # Biblioteca para buscar papers en arXiv
 from dotenv import load_dotenv
-import openai  # Cliente de OpenAI para generación de texto
-from groq import Groq  # Cliente alternativo de LLM
 import random  # Para generación de grafos de conocimiento de respaldo
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import List, Dict, Optional  # Tipado de datos
-import translators as ts  # Biblioteca para traducción de consultas
-from langsmith import Client, traceable  # Decorador para seguimiento y rastreo de funciones
-from langchain.callbacks import LangChainTracer
+import jsonschema  # Validación de la salida estructurada del grafo
+from langsmith import traceable  # Decorador para seguimiento y rastreo de funciones
+from langsmith.utils import ContextThreadPoolExecutor  # Mantiene el contexto de trazas entre hilos
+from core.llm_manager import LLMManager, TokenStream  # Cliente LLM compartido (OpenAI/Groq)
+from core.client_pool import client_pool  # Clientes reutilizados entre reruns y sesiones
+from core.translation_service import get_translation_service  # Traducción compartida con caché
+from core.arxiv_store import get_arxiv_store  # Almacén local de resultados de arXiv
+from core.embedding_index import embed_texts, get_embedding_index  # Índice local de abstracts
+from core.context_packer import ContextPacker  # Presupuesto de tokens para los papers del prompt
+from config.settings import SCIENTIFIC_RAG_SETTINGS, EMBEDDING_INDEX_SETTINGS
 
 # Cargar variables de entorno
 load_dotenv()
 
+
+@dataclass
+class ScientificPipelineContext:
+    """
+    Artefactos calculados por las etapas del pipeline RAG.
+    Cada artefacto se calcula una sola vez y se pasa entre etapas.
+    """
+    query: str
+    query_en: Optional[str] = None
+    papers: Optional[List[Dict]] = None
+    prompt_papers: Optional[List[Dict]] = None  # Papers ordenados y comprimidos para los prompts
+    knowledge_graph: Optional[List[Dict]] = None
+    graph_enrichment: Optional[List[Dict]] = None
+    scientific_content: Optional[str] = None
+
+
 class ScientificContentRAG:
     # Mapeo de dominios científicos entre español e inglés
     # Esto permite búsquedas más precisas en diferentes idiomas
@@ -29,13 +53,52 @@ class ScientificContentRAG:
         "robótica": "Robotics",
         "computación cuántica": "Quantum Computing"
     }
+
+    # Esquema de la salida estructurada del grafo enriquecido
+    ENRICHED_GRAPH_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "relations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "source_concept": {"type": "string"},
+                        "relation": {"type": "string"},
+                        "target_concept": {"type": "string"},
+                        "explanation": {"type": "string"},
+                        "significance": {"type": "string", "enum": ["high", "medium", "low"]},
+                        "implications": {"type": "string"},
+                        "confidence_level": {"type": "string", "enum": ["high", "medium", "low"]}
+                    },
+                    "required": [
+                        "source_concept", "relation", "target_concept", "explanation",
+                        "significance", "implications", "confidence_level"
+                    ],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["relations"],
+        "additionalProperties": False
+    }
+
+    # Artefactos independientes del idioma de salida (papers y grafo), compartidos
+    # entre instancias para reutilizarlos al repetir una consulta en otro idioma
+    _artifact_store = OrderedDict()
+    _artifact_lock = threading.Lock()
+
+    # Indexado de abstracts fuera de la petición: un único hilo compartido que
+    # serializa las cargas del modelo de embeddings y las escrituras del índice
+    _indexing_executor = ContextThreadPoolExecutor(max_workers=1, thread_name_prefix="arxiv-index")
     
     def __init__(
         self, 
         domain: str = "física cuántica",  # Dominio científico por defecto
         language: str = "castellano",     # Idioma de salida por defecto
         max_papers: int = 5,              # Límite de papers a recuperar
-        provider: str = 'openai'          # Proveedor de LLM por defecto
+        provider: str = 'openai',         # Proveedor de LLM por defecto
+        llm_cache=None                    # Caché de respuestas (None = configuración global)
     ):
         """
         Constructor del sistema RAG (Retrieval-Augmented Generation) científico.
@@ -50,31 +113,29 @@ class ScientificContentRAG:
         self.logger.setLevel(logging.INFO)
          # Configurar LangSmith
         try:
-            self.langsmith_client = Client(
-                api_key=os.getenv('LANGCHAIN_API_KEY'),
-                
+            self.langsmith_client = client_pool.get(
+                'langsmith',
+                api_key=os.getenv('LANGCHAIN_API_KEY')
             )
         except Exception as e:
             self.logger.error(f"Error inicializando LangSmith: {e}")
             self.langsmith_client = None
             
-        self.tracer = LangChainTracer()
+        self.tracer = client_pool.get('langchain-tracer')
         
         self.domain_en = self.DOMAIN_MAP.get(domain.lower(), domain)
         self.domain = domain
         self.language = language
         self.max_papers = max_papers
         self.provider = provider
+        self.arxiv_store = get_arxiv_store()
+        self.embedding_index = get_embedding_index()
         
-        # Inicialización dinámica del cliente LLM según el proveedor
-        if provider == 'openai':
-            self.client = openai.OpenAI()
-            self.model = "gpt-4o-mini"  # Modelo más reciente y eficiente
-        elif provider == 'groq':
-            self.client = Groq()
-            self.model = "llama3-8b-8192"  # Modelo alternativo de Groq
-        else:
-            raise ValueError(f"Proveedor no soportado: {provider}")
+        # Las llamadas al LLM pasan por LLMManager (OpenAI o Groq)
+        self.llm = LLMManager(provider=provider, cache=llm_cache)
+        self.client = self.llm.client
+        self.model = self.llm.model
+        self.context_packer = ContextPacker(provider, self.model)
         
     
     def _translate_query(self, query: str) -> str:
@@ -82,13 +143,12 @@ class ScientificContentRAG:
         Traduce consultas al inglés para búsquedas más precisas.
         
         Características:
-        - Usa librería de traducción externa
-        - Maneja errores de traducción
+        - Usa el servicio de traducción compartido (con caché persistente)
+        - Omite la traducción si la consulta ya está en inglés
         - Fallback a consulta original si falla
         """
         try:
-            # Traducción robusta usando librería translators
-            translated_query = ts.translate_text(query, to_language='en')
+            translated_query = get_translation_service().translate(query, target='en')
             return translated_query
         except Exception as e:
             print(f"Translation error: {e}")
@@ -100,16 +160,27 @@ class ScientificContentRAG:
         Búsqueda de papers científicos en arXiv.
         
         Proceso:
-        1. Traduce consulta
-        2. Combina dominio y consulta
-        3. Busca en arXiv
-        4. Extrae metadatos relevantes
+        1. Consulta el almacén local (solo él en modo offline)
+        2. Busca en el índice local de embeddings
+        3. Combina dominio y consulta (ya traducida al inglés)
+        4. Busca en arXiv si la cobertura local no es suficiente
+        5. Extrae metadatos relevantes, los guarda y los indexa en segundo plano
         """
-        # Traducir consulta para búsqueda precisa
-        query_en = self._translate_query(query)
+        # Resultados guardados de la misma consulta
+        stored_papers = self.arxiv_store.get_query(self.domain_en, query, self.max_papers)
+        if stored_papers is not None:
+            return stored_papers
+        
+        # Primera pasada sobre el corpus local de abstracts
+        local_papers = self._search_local_index(query)
+        if local_papers is not None:
+            return local_papers
+        
+        if self.arxiv_store.offline:
+            return self.arxiv_store.search_local(self.domain_en, query, self.max_papers)
         
         # Combinar dominio y consulta para mayor precisión
-        full_query = f"{self.domain_en} {query_en}"
+        full_query = f"{self.domain_en} {query}"
         
         # Búsqueda en arXiv con parámetros configurables
         search = arxiv.Search(
@@ -127,28 +198,58 @@ class ScientificContentRAG:
                 'authors': [author.name for author in result.authors],
                 'url': result.entry_id
             })
-        extra_metadata = {
-        "query": query, 
-        "domain": self.domain_en, 
-        "papers_found": len(papers), 
-        "language": self.language, 
-        "max_results_configured": self.max_papers
-    }
+        
+        self.arxiv_store.put_query(self.domain_en, query, self.max_papers, papers)
+        # Los embeddings no bloquean la respuesta; sirven a consultas posteriores
+        self._indexing_executor.submit(self._index_papers, papers)
         return papers
 
-    @traceable(name="synthesize_content", run_type="llm", tags=["scientific-content"])
-    def _synthesize_content(self, papers: List[Dict], query: str) -> str:
+    def _search_local_index(self, query: str) -> Optional[List[Dict]]:
         """
-        Sintetiza contenido científico utilizando LLM.
+        Recupera papers del índice local de embeddings.
+        Devuelve None si no hay suficientes papers relevantes.
+        """
+        if self.embedding_index is None or len(self.embedding_index) == 0:
+            return None
+        
+        try:
+            query_vector = embed_texts([f"{self.domain_en} {query}"])[0]
+            hits = self.embedding_index.search(query_vector, k=self.max_papers)
+        except Exception as e:
+            self.logger.error(f"Error en búsqueda local de embeddings: {e}")
+            return None
+        
+        relevant_ids = [
+            paper_id for paper_id, score in hits
+            if score >= EMBEDDING_INDEX_SETTINGS["min_score"]
+        ]
+        if len(relevant_ids) < self.max_papers:
+            return None
+        
+        papers = self.arxiv_store.get_papers(relevant_ids)
+        return papers if len(papers) == len(relevant_ids) else None
+
+    def _index_papers(self, papers: List[Dict]):
+        """
+        Añade los abstracts recuperados al índice local de embeddings
+        """
+        new_papers = [p for p in papers if self.embedding_index is not None and p['url'] not in self.embedding_index]
+        if not new_papers:
+            return
         
-        Proceso avanzado de generación:
+        try:
+            vectors = embed_texts(f"{p['title']}. {p['summary']}" for p in new_papers)
+            self.embedding_index.add([p['url'] for p in new_papers], vectors)
+        except Exception as e:
+            self.logger.error(f"Error indexando papers: {e}")
+
+    def _synthesis_messages(self, papers: List[Dict], query_en: str) -> List[Dict]:
+        """
+        Prepara los mensajes de síntesis:
         1. Preparar papers
         2. Configurar instrucciones de sistema
-        3. Generar contenido adaptado a idioma y dominio
+        3. Adaptar a idioma y dominio
         """
-        # Traducir consulta
-        query_en = self._translate_query(query)
-        
         # Formatear textos de papers
         paper_texts = "\n\n".join([
             f"Paper: {p['title']}\nSummary: {p['summary']}" 
@@ -187,19 +288,34 @@ class ScientificContentRAG:
         Please write an article of approximately 500 words entirely in {language_instructions.get(self.language, 'the target language')}.
         """
         
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    @traceable(name="synthesize_content", run_type="llm", tags=["scientific-content"])
+    def _synthesize_content(self, papers: List[Dict], query_en: str) -> str:
+        """
+        Sintetiza contenido científico utilizando LLM.
+        """
         # Generación de contenido con LLM
-        response = self.client.chat.completions.create(
-    model=self.model,
-    messages=[
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt}
-    ],
-    extra_headers={
-        "X-Langsmith-Trace": "true"  # Opcional: añade un header para identificación
-    }
-)
-        
-        return response.choices[0].message.content
+        return self.llm.chat(
+            self._synthesis_messages(papers, query_en),
+            extra_headers={
+                "X-Langsmith-Trace": "true"  # Opcional: añade un header para identificación
+            }
+        )
+
+    def _stream_synthesis(self, papers: List[Dict], query_en: str):
+        """
+        Síntesis en streaming: produce el artículo fragmento a fragmento
+        """
+        return self.llm.stream_chat(
+            self._synthesis_messages(papers, query_en),
+            extra_headers={
+                "X-Langsmith-Trace": "true"
+            }
+        )
 
     @traceable(name="generate_knowledge_graph", run_type="llm", tags=["scientific-content"])
     def _generate_knowledge_graph(self, papers: List[Dict]) -> List[Dict]:
@@ -216,8 +332,7 @@ class ScientificContentRAG:
         
         try:
             # Generación de grafo con LLM
-            response = self.client.chat.completions.create(
-                model=self.model,
+            relations_text = self.llm.chat(
                 messages=[
                     {
                         "role": "system", 
@@ -247,7 +362,6 @@ class ScientificContentRAG:
             )
             
             # Procesamiento avanzado de relaciones
-            relations_text = response.choices[0].message.content
             graph_enrichment = []
             
             for line in relations_text.split('\n'):
@@ -292,8 +406,7 @@ class ScientificContentRAG:
         """
         try:
             # Generación de enriquecimiento con LLM
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response_text = self.llm.chat(
                 messages=[
                     {
                         "role": "system", 
@@ -327,7 +440,7 @@ class ScientificContentRAG:
             )
             
             # Procesamiento robusto de JSON
-            response_text = response.choices[0].message.content.strip()
+            response_text = response_text.strip()
             
             def parse_json(text):
                 try:
@@ -364,44 +477,221 @@ class ScientificContentRAG:
             print(f"Enrichment process failed: {e}")
             return graph_enrichment
 
+    def _artifact_key(self, query_en: str):
+        normalized_query = " ".join(query_en.lower().split())
+        return (self.provider, self.model, self.domain_en, normalized_query, self.max_papers)
+
+    def _build_context(self, query: str) -> ScientificPipelineContext:
+        """
+        Crea el contexto del pipeline: traduce la consulta una sola vez y
+        recupera los artefactos ya calculados para ella en cualquier idioma
+        """
+        context = ScientificPipelineContext(query=query)
+        context.query_en = self._translate_query(query)
+        
+        with self._artifact_lock:
+            artifacts = self._artifact_store.get(self._artifact_key(context.query_en))
+            if artifacts is not None:
+                self._artifact_store.move_to_end(self._artifact_key(context.query_en))
+        
+        if artifacts is not None:
+            context.papers = artifacts['papers']
+            context.knowledge_graph = artifacts['knowledge_graph']
+            context.graph_enrichment = artifacts['graph_enrichment']
+        return context
+
+    def _store_artifacts(self, context: ScientificPipelineContext):
+        """
+        Guarda los artefactos independientes del idioma para reutilizarlos
+        """
+        key = self._artifact_key(context.query_en)
+        with self._artifact_lock:
+            self._artifact_store[key] = {
+                'papers': context.papers,
+                'knowledge_graph': context.knowledge_graph,
+                'graph_enrichment': context.graph_enrichment
+            }
+            self._artifact_store.move_to_end(key)
+            while len(self._artifact_store) > SCIENTIFIC_RAG_SETTINGS["artifact_cache_size"]:
+                self._artifact_store.popitem(last=False)
+
+    @traceable(name="extract_enriched_graph", run_type="llm", tags=["scientific-content"])
+    def _extract_enriched_graph(self, papers: List[Dict]) -> List[Dict]:
+        """
+        Extracción y enriquecimiento del grafo en una sola llamada con salida estructurada.
+        
+        Características:
+        - JSON Schema estricto en OpenAI; modo JSON con el esquema en el prompt en Groq
+        - Validación del resultado contra el esquema
+        - Lanza excepción si la respuesta no es válida (se usa el flujo en dos pasos)
+        """
+        schema_text = json.dumps(self.ENRICHED_GRAPH_SCHEMA, indent=2)
+        messages = [
+            {
+                "role": "system", 
+                "content": """
+                Advanced scientific knowledge graph generator. 
+                Extract meaningful semantic relationships and enrich them
+                with context and significance. Respond only with JSON.
+                """
+            },
+            {
+                "role": "user", 
+                "content": f"""
+                Generate the most significant knowledge graph relationships.
+                Guidelines:
+                - Extract 3-5 impactful conceptual relationships
+                - Provide brief explanations
+                - Rate significance and confidence as high/medium/low
+                - Describe the implications briefly
+                
+                Respond with JSON matching this schema:
+                {schema_text}
+                
+                Papers Summaries:
+                """
+                + "\n\n".join(f"Paper {i+1}: Title: {p['title']}\nSummary: {p['summary']}" for i, p in enumerate(papers))
+            }
+        ]
+        
+        if self.provider == 'openai':
+            response_format = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "enriched_knowledge_graph",
+                    "schema": self.ENRICHED_GRAPH_SCHEMA,
+                    "strict": True
+                }
+            }
+        else:
+            response_format = {"type": "json_object"}
+        
+        response_text = self.llm.chat(
+            messages,
+            response_format=response_format,
+            extra_headers={
+                "X-Langsmith-Trace": "true"
+            },
+            temperature=0.7
+        )
+        
+        parsed = json.loads(response_text)
+        jsonschema.validate(parsed, self.ENRICHED_GRAPH_SCHEMA)
+        if not parsed["relations"]:
+            raise ValueError("La salida estructurada no contiene relaciones")
+        return parsed["relations"]
+
+    def _build_graph(self, context: ScientificPipelineContext):
+        """
+        Rama del grafo: una llamada con salida estructurada y, si falla,
+        extracción y enriquecimiento en dos pasos
+        """
+        try:
+            context.knowledge_graph = self._extract_enriched_graph(context.prompt_papers)
+            context.graph_enrichment = context.knowledge_graph
+            return
+        except Exception as e:
+            self.logger.warning(f"Salida estructurada del grafo no disponible, usando dos pasos: {e}")
+        
+        context.knowledge_graph = self._generate_knowledge_graph(context.prompt_papers)
+        context.graph_enrichment = context.knowledge_graph
+        try:
+            context.graph_enrichment = self._enrich_graph_relationships(context.knowledge_graph)
+        except Exception as e:
+            print(f"Graph enrichment failed: {e}")
+
+    def _pack_papers(self, context: ScientificPipelineContext):
+        """
+        Ajusta los papers al presupuesto de tokens del modelo: los más
+        relevantes primero y abstracts comprimidos si no caben completos
+        """
+        context.prompt_papers = self.context_packer.pack(context.papers, context.query_en)
+
+    def _report(self, context: ScientificPipelineContext) -> Dict:
+        return {
+            'scientific_content': context.scientific_content,
+            'papers': context.papers,
+            'graph_enrichment': context.graph_enrichment
+        }
+
     @traceable(name="generate_scientific_graph_report", run_type="llm", tags=["scientific-content"])
     def generate_scientific_graph_report(self, query: str) -> Dict:
         """
         Método principal: genera informe científico completo.
         
-        Proceso integral:
+        Proceso integral (cada etapa solo se ejecuta si su artefacto
+        no está ya en el contexto):
         1. Traducir consulta
         2. Buscar papers
         3. Sintetizar contenido
         4. Generar grafo de conocimiento
         5. Enriquecer grafo
         """
-        # Traducir consulta para procesamiento consistente
-        query_en = self._translate_query(query)
+        context = self._build_context(query)
         
         # Recuperar papers científicos
-        papers = self._search_arxiv_papers(query_en)
+        if context.papers is None:
+            context.papers = self._search_arxiv_papers(context.query_en)
         
-        if not papers:
+        if not context.papers:
             return {
                 'error': 'No scientific papers found',
                 'papers': [],
                 'graph_enrichment': []
             }
+        self._pack_papers(context)
         
-        # Sintetizar contenido científico
-        scientific_content = self._synthesize_content(papers, query_en)
+        # Síntesis y grafo son independientes: se ejecutan en paralelo y la
+        # latencia total es la de la rama más lenta
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            graph_future = None
+            if context.graph_enrichment is None:
+                graph_future = executor.submit(self._build_graph, context)
+            
+            # Sintetizar contenido científico (única etapa que depende del idioma)
+            synthesis_future = executor.submit(self._synthesize_content, context.prompt_papers, context.query_en)
+            
+            context.scientific_content = synthesis_future.result()
+            if graph_future is not None:
+                graph_future.result()
         
-        # Generar y enriquecer grafo de conocimiento
-        graph_enrichment = self._generate_knowledge_graph(papers)
-        try:
-            graph_enrichment = self._enrich_graph_relationships(graph_enrichment)
-        except Exception as e:
-            print(f"Graph enrichment failed: {e}")
+        self._store_artifacts(context)
         
         # Retornar informe científico completo
-        return {
-            'scientific_content': scientific_content,
-            'papers': papers,
-            'graph_enrichment': graph_enrichment
-        }
\ No newline at end of file
+        return self._report(context)
+
+    def stream_scientific_graph_report(self, query: str) -> TokenStream:
+        """
+        Versión en streaming de generate_scientific_graph_report.
+        
+        El artículo se produce fragmento a fragmento mientras el grafo se
+        genera en segundo plano. Al consumir el stream, `result` contiene
+        el mismo diccionario que devuelve el método principal.
+        """
+        context = self._build_context(query)
+        
+        if context.papers is None:
+            context.papers = self._search_arxiv_papers(context.query_en)
+        
+        if not context.papers:
+            return TokenStream(iter(()), on_complete=lambda text: {
+                'error': 'No scientific papers found',
+                'papers': [],
+                'graph_enrichment': []
+            })
+        self._pack_papers(context)
+        
+        graph_future = None
+        if context.graph_enrichment is None:
+            executor = ContextThreadPoolExecutor(max_workers=1)
+            graph_future = executor.submit(self._build_graph, context)
+            executor.shutdown(wait=False)
+        
+        def finish(text):
+            context.scientific_content = text
+            if graph_future is not None:
+                graph_future.result()
+            self._store_artifacts(context)
+            return self._report(context)
+        
+        return TokenStream(self._stream_synthesis(context.prompt_papers, context.query_en), on_complete=finish)
@@ -0,0 +1,151 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import yfinance as yf
+
+from config.settings import CACHE_DIR, TICKER_METADATA_SETTINGS
+
+
+class TickerMetadataStore:
+    """
+    Almacén persistente de metadatos de tickers (símbolo → nombre, mercado, divisa).
+
+    Características:
+    - SQLite local con TTL largo
+    - Las lecturas nunca esperan a Yahoo Finance: los símbolos ausentes
+      o caducados se refrescan en segundo plano
+    - Pre-carga masiva de símbolos conocidos
+    - Los fallos se recuerdan durante `failure_ttl` para no reintentarlos
+      en cada petición
+    """
+
+    def __init__(self, db_path, ttl=30 * 24 * 3600, refresh_workers=4, failure_ttl=3600):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="ticker-metadata")
+        self._in_flight = set()
+        self._failed_until = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tickers (
+                    symbol TEXT PRIMARY KEY,
+                    name TEXT,
+                    exchange TEXT,
+                    currency TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get_many(self, symbols):
+        """
+        Metadatos guardados de los símbolos pedidos (aunque estén caducados).
+        Los ausentes o caducados se programan para refresco en segundo plano.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        placeholders = ",".join("?" * len(symbols))
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT symbol, name, exchange, currency, updated_at FROM tickers WHERE symbol IN ({placeholders})",
+                symbols
+            ).fetchall()
+
+        now = time.time()
+        metadata = {}
+        stale = set(symbols)
+        for symbol, name, exchange, currency, updated_at in rows:
+            metadata[symbol] = {"name": name, "exchange": exchange, "currency": currency}
+            if now - updated_at <= self.ttl:
+                stale.discard(symbol)
+
+        if stale:
+            self.refresh_async(stale)
+        return metadata
+
+    def get_names(self, symbols):
+        """
+        Nombre para mostrar de cada símbolo; el propio símbolo si aún no se conoce
+        """
+        metadata = self.get_many(symbols)
+        return {
+            symbol: (metadata.get(symbol) or {}).get("name") or symbol
+            for symbol in symbols
+        }
+
+    def preseed(self, symbols):
+        """
+        Pre-carga en segundo plano los símbolos que falten o hayan caducado
+        """
+        self.get_many(symbols)
+
+    def refresh_async(self, symbols):
+        now = time.time()
+        with self._lock:
+            pending = [
+                symbol for symbol in symbols
+                if symbol not in self._in_flight and self._failed_until.get(symbol, 0) <= now
+            ]
+            self._in_flight.update(pending)
+
+        for symbol in pending:
+            self._executor.submit(self._refresh_symbol, symbol)
+
+    def _refresh_symbol(self, symbol):
+        try:
+            info = yf.Ticker(symbol).info
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tickers VALUES (?, ?, ?, ?, ?)",
+                    (
+                        symbol,
+                        info.get("longName") or info.get("shortName") or symbol,
+                        info.get("exchange"),
+                        info.get("currency"),
+                        time.time()
+                    )
+                )
+            with self._lock:
+                self._failed_until.pop(symbol, None)
+        except Exception as e:
+            self.logger.warning(f"No se pudieron obtener metadatos de {symbol}: {e}")
+            with self._lock:
+                self._failed_until[symbol] = time.time() + self.failure_ttl
+        finally:
+            with self._lock:
+                self._in_flight.discard(symbol)
+
+
+_ticker_metadata_store = None
+_ticker_metadata_lock = threading.Lock()
+
+
+def get_ticker_metadata_store():
+    """
+    Almacén de metadatos compartido por el proceso
+    """
+    global _ticker_metadata_store
+    with _ticker_metadata_lock:
+        if _ticker_metadata_store is None:
+            _ticker_metadata_store = TickerMetadataStore(
+                os.path.join(CACHE_DIR, "ticker_metadata.sqlite3"),
+                **TICKER_METADATA_SETTINGS
+            )
+    return _ticker_metadata_store
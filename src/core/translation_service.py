@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+
+from deep_translator import GoogleTranslator
+
+from config.settings import CACHE_DIR, TRANSLATION_SETTINGS
+
+# Idiomas de la interfaz y su código ISO
+LANGUAGE_CODES = {
+    "castellano": "es",
+    "english": "en",
+    "français": "fr",
+    "italiano": "it"
+}
+
+# Palabras muy frecuentes para reconocer el idioma sin llamadas de red
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "in", "is", "for", "on", "with", "that", "are", "as", "by", "from"},
+    "es": {"el", "la", "de", "que", "y", "en", "los", "las", "del", "para", "por", "con", "una", "es"},
+    "fr": {"le", "la", "les", "de", "des", "et", "est", "une", "du", "pour", "dans", "sur", "que", "au"},
+    "it": {"il", "la", "di", "che", "e", "per", "una", "del", "della", "sono", "con", "gli", "non", "le"}
+}
+
+_SEPARATOR = "\n"
+
+
+def guess_language(text):
+    """
+    Estimación barata del idioma para textos de los idiomas de la interfaz.
+    Devuelve None si no hay suficiente evidencia.
+    """
+    words = re.findall(r"[^\W\d_]+", text.lower())
+    if not words:
+        return None
+
+    scores = {
+        code: sum(1 for word in words if word in stopwords)
+        for code, stopwords in _STOPWORDS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    if best_score >= 2 and best_score >= 2 * second_score:
+        return best
+    return None
+
+
+class TranslationService:
+    """
+    Servicio de traducción compartido por todos los módulos.
+
+    Características:
+    - Todas las cadenas de una petición viajan en una sola llamada
+    - Caché persistente por (texto, origen, destino)
+    - Se omiten los textos que ya están en el idioma de destino
+    """
+
+    def __init__(self, db_path, max_chars=4500):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.max_chars = max_chars
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT PRIMARY KEY,
+                    translation TEXT NOT NULL
+                )
+                """
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _cache_key(text, source, target):
+        return hashlib.sha256(f"{source}\x00{target}\x00{text}".encode("utf-8")).hexdigest()
+
+    def translate(self, text, target, source="auto"):
+        return self.translate_batch([text], target, source)[0]
+
+    def translate_batch(self, texts, target, source="auto"):
+        """
+        Traduce una lista de textos conservando el orden. Los textos que no
+        se puedan traducir se devuelven sin cambios.
+        """
+        target = LANGUAGE_CODES.get(target, target)
+        results = list(texts)
+
+        # Textos que realmente necesitan traducción
+        pending = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            if source == target or (source == "auto" and guess_language(text) == target):
+                continue
+            pending.setdefault(text, []).append(i)
+
+        if not pending:
+            return results
+
+        cached = self._get_cached(list(pending), source, target)
+        for text, translation in cached.items():
+            for i in pending.pop(text):
+                results[i] = translation
+
+        if pending:
+            translated = self._translate_remote(list(pending), source, target)
+            self._store(translated, source, target)
+            for text, translation in translated.items():
+                for i in pending[text]:
+                    results[i] = translation
+
+        return results
+
+    def _get_cached(self, texts, source, target):
+        keys = {self._cache_key(text, source, target): text for text in texts}
+        placeholders = ",".join("?" * len(keys))
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                list(keys)
+            ).fetchall()
+        return {keys[key]: translation for key, translation in rows}
+
+    def _store(self, translations, source, target):
+        if not translations:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?)",
+                [
+                    (self._cache_key(text, source, target), translation)
+                    for text, translation in translations.items()
+                ]
+            )
+
+    def _chunks(self, texts):
+        """
+        Agrupa los textos en bloques que caben en una petición
+        """
+        chunk, size = [], 0
+        for text in texts:
+            if chunk and size + len(text) + len(_SEPARATOR) > self.max_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + len(_SEPARATOR)
+        if chunk:
+            yield chunk
+
+    def _translate_remote(self, texts, source, target):
+        translator = GoogleTranslator(source=source, target=target)
+        translated = {}
+
+        for chunk in self._chunks(texts):
+            # Una línea por texto: los saltos internos se aplanan para poder separar la respuesta
+            joined = _SEPARATOR.join(" ".join(text.split()) for text in chunk)
+            try:
+                parts = translator.translate(joined).split(_SEPARATOR)
+                if len(parts) == len(chunk):
+                    translated.update(zip(chunk, (part.strip() for part in parts)))
+                    continue
+                self.logger.warning("La traducción agrupada no conservó las líneas; traduciendo por separado")
+            except Exception as e:
+                self.logger.error(f"Translation error: {e}")
+
+            # Respaldo: una petición por texto
+            for text in chunk:
+                try:
+                    translated[text] = translator.translate(text)
+                except Exception as e:
+                    self.logger.error(f"Translation error: {e}")
+
+        return translated
+
+
+_translation_service = None
+_translation_service_lock = threading.Lock()
+
+
+def get_translation_service():
+    """
+    Servicio de traducción compartido por el proceso
+    """
+    global _translation_service
+    with _translation_service_lock:
+        if _translation_service is None:
+            _translation_service = TranslationService(
+                os.path.join(CACHE_DIR, "translations.sqlite3"),
+                **TRANSLATION_SETTINGS
+            )
+    return _translation_service